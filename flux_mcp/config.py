@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Any
 
@@ -45,12 +45,6 @@ class FluxConfig:
     prefetch_size: int = 5 * 1024 * 1024  # 5MB
     use_mmap_always: bool = False
     
-    def __post_init__(self) -> None:
-        # Create directories if they don't exist
-        self.temp_dir.mkdir(parents=True, exist_ok=True)
-        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
-        self.log_file.parent.mkdir(parents=True, exist_ok=True)
-
     @classmethod
     def from_dict(cls, config_dict: dict[str, Any]) -> 'FluxConfig':
         # Convert string paths to Path objects
@@ -64,15 +58,10 @@ class FluxConfig:
         return cls(**config_dict)
 
     def to_dict(self) -> dict[str, Any]:
-        result: dict[str, Any] = {}
-        
-        for field_name, field_value in self.__dict__.items():
-            if isinstance(field_value, Path):
-                result[field_name] = str(field_value)
-            else:
-                result[field_name] = field_value
-        
-        return result
+        return {
+            field_name: str(field_value) if isinstance(field_value, Path) else field_value
+            for field_name, field_value in asdict(self).items()
+        }
 
 
 @dataclass
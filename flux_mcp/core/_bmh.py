@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import numpy as np
+
+# Numba is optional; without it callers stay on bytes.find
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def skip_table(pattern: bytes) -> np.ndarray:
+    # Horspool bad-character shifts: distance from a byte's last occurrence
+    # (ignoring the final position) to the end of the pattern
+    length: int = len(pattern)
+    table: np.ndarray = np.full(256, length, dtype=np.int64)
+    for i, byte in enumerate(pattern[:-1]):
+        table[byte] = length - 1 - i
+    return table
+
+
+def _bmh_all(text: np.ndarray, pattern: np.ndarray, skip: np.ndarray) -> np.ndarray:
+    # Every (overlapping) start position; the Horspool shift is safe after a
+    # hit as well as a miss, so no occurrence is skipped
+    text_length = text.shape[0]
+    last = pattern.shape[0] - 1
+    matches = np.empty(64, dtype=np.int64)
+    count = 0
+    pos = 0
+
+    while pos + last < text_length:
+        tail = text[pos + last]
+        if tail == pattern[last]:
+            i = 0
+            while i < last and text[pos + i] == pattern[i]:
+                i += 1
+            if i == last:
+                if count == matches.shape[0]:
+                    grown = np.empty(count * 2, dtype=np.int64)
+                    grown[:count] = matches
+                    matches = grown
+                matches[count] = pos
+                count += 1
+        pos += skip[tail]
+
+    return matches[:count]
+
+
+if NUMBA_AVAILABLE:
+    bmh_all = njit(cache=True, boundscheck=False)(_bmh_all)
+else:
+    bmh_all = _bmh_all
@@ -1,17 +1,135 @@
 from __future__ import annotations
 
+import os
+import re
+import logging
+import traceback
+import warnings
+import mmap
 import asyncio
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
 from flux_mcp.core.transaction_manager import TransactionManager
 from flux_mcp.core.memory_manager import MemoryManager
+from flux_mcp.core.metal_accelerator import MULTI_PATTERN_AVAILABLE, compile_multi_pattern, search_multi
 from flux_mcp.operations.file_handler import FileHandler
 from flux_mcp.operations.text_editor import TextEditor
-from flux_mcp.operations.search_engine import SearchEngine
+from flux_mcp.operations.search_engine import SearchEngine, _CONTEXT_BYTES
 from flux_mcp.operations.version_control import VersionControl
+from flux_mcp.utils.regex_cache import compile_regex
+
+_CLASS_RE: re.Pattern = re.compile(r'^\s*class\s+(\w+)', re.MULTILINE)
+_DEF_RE: re.Pattern = re.compile(r'^\s*def\s+(\w+)', re.MULTILINE)
+_LINE_NO_RE: re.Pattern = re.compile(r'line (\d+)')
+_LITERAL_PIECE_RE: re.Pattern = re.compile(r'(?:[^\\.^$*+?{}\[\]()|]|\\[^A-Za-z0-9])+')
+_ESCAPED_CHAR_RE: re.Pattern = re.compile(r'\\(.)', re.DOTALL)
+
+_BATCH_WRITE_LIMIT: int = 64 * 1024
+_BATCH_WRITE_SIZE: int = 32
+
+_TARGET_NOT_FOUND: str = 'target_not_found'
+_TARGET_NOT_FOUND_BRIEF: str = 'target_not_found_brief'
+_SYNTAX_ERROR: str = 'syntax_error'
+_OTHER_ERROR: str = 'other'
+
+_TARGET_FORMAT_HELP: str = (
+    "Target not found in {path}\n\n"
+    "CORRECT FORMAT: Use 'ClassName' or 'ClassName.method_name' format.\n"
+    "DO NOT include 'class' or 'def' keywords, parentheses, or colons.\n\n"
+    "EXAMPLES:\n"
+    "  highlight='MyClass'        ✓ CORRECT\n"
+    "  highlight='MyClass.method' ✓ CORRECT\n"
+    "  highlight='class MyClass'  ✗ INCORRECT (don't include 'class')\n"
+    "  highlight='def method()'   ✗ INCORRECT (don't include 'def' or parentheses)\n\n"
+)
+
+_ERROR_HELP: dict[str, str] = {
+    _TARGET_NOT_FOUND: (
+        _TARGET_FORMAT_HELP +
+        "This file contains approximately {class_count} classes and {func_count} functions.\n\n"
+        "{suggestions}\n\n"
+        "ERROR DETAILS: {error}"
+    ),
+    _TARGET_NOT_FOUND_BRIEF: _TARGET_FORMAT_HELP + "ERROR DETAILS: {error}",
+    _SYNTAX_ERROR: (
+        "SYNTAX ERROR: The replacement code contains Python syntax errors {line_info}.\n\n"
+        "ERROR DETAILS: {error}\n\n"
+        "Try using triple quotes for multi-line code: replace_with=\"\"\"def method():\\n    ..."
+    ),
+    _OTHER_ERROR: "Failed to replace text: {error}"
+}
+
+_RECOVERY_HELP: str = (
+    "🛠️ RECOVERY SUGGESTION: Found similar target '{target}'.\n\n"
+    "Would you like to use this target instead?\n"
+    "Try with: highlight='{target}'"
+)
+
+
+def _compile(pattern: str | bytes, ignorecase: bool, whole_word: bool) -> re.Pattern:
+    if whole_word:
+        pattern = rb'\b' + pattern + rb'\b' if isinstance(pattern, bytes) else rf'\b{pattern}\b'
+    
+    return compile_regex(pattern, re.IGNORECASE if ignorecase else 0, linear=True)
+
+
+@lru_cache(maxsize=1024)
+def _literal_alternatives(pattern: str) -> tuple[str, ...] | None:
+    # 'error|warning|fatal' is a set of plain strings, which a multi-literal
+    # matcher finds in one pass over the file
+    pieces: list[str] = pattern.split('|')
+    if len(pieces) < 2 or not all(_LITERAL_PIECE_RE.fullmatch(piece) for piece in pieces):
+        return None
+    return tuple(_ESCAPED_CHAR_RE.sub(r'\1', piece) for piece in pieces)
+
+
+def _classify_error(error_str: str) -> str:
+    if "could not find" in error_str:
+        return _TARGET_NOT_FOUND
+    if "invalid python" in error_str or "syntax error" in error_str:
+        return _SYNTAX_ERROR
+    return _OTHER_ERROR
+
+
+def _find_literal(buffer: mmap.mmap, needle: bytes) -> Iterator[tuple[int, int]]:
+    # One C-level find per match over the whole buffer, no regex machinery
+    length: int = len(needle)
+    pos: int = buffer.find(needle)
+    while pos != -1:
+        yield pos, pos + length
+        pos = buffer.find(needle, pos + length)
+
+
+# Pools shared by engines in the process, keyed by worker count so each
+# engine gets the size it was configured with; a pool closes with its last
+# user
+_EXECUTORS: dict[int, ThreadPoolExecutor] = {}
+_EXECUTOR_USERS: dict[int, int] = {}
+
+
+def _acquire_executor(worker_count: int) -> ThreadPoolExecutor:
+    workers: int = max(1, min(worker_count, (os.cpu_count() or 4) + 4))
+    executor: ThreadPoolExecutor | None = _EXECUTORS.get(workers)
+    if executor is None:
+        executor = _EXECUTORS[workers] = ThreadPoolExecutor(max_workers=workers)
+    _EXECUTOR_USERS[workers] = _EXECUTOR_USERS.get(workers, 0) + 1
+    return executor
+
+
+def _release_executor(executor: ThreadPoolExecutor) -> None:
+    workers: int | None = next(
+        (size for size, pooled in _EXECUTORS.items() if pooled is executor), None
+    )
+    if workers is None:
+        return
+    _EXECUTOR_USERS[workers] -= 1
+    if _EXECUTOR_USERS[workers] <= 0:
+        del _EXECUTORS[workers], _EXECUTOR_USERS[workers]
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 @dataclass
@@ -21,6 +139,9 @@ class EngineConfig:
     worker_count: int
     cache_size: int
     gpu_enabled: bool
+    io_thread_count: int = 4
+    debug_mode: bool = False
+    gpu_min_bytes: int = 256 * 1024
 
 
 class FluxEngine:
@@ -30,19 +151,32 @@ class FluxEngine:
         self.memory_manager: MemoryManager = MemoryManager(config)
         self.file_handler: FileHandler = FileHandler(self.transaction_manager, self.memory_manager)
         self.text_editor: TextEditor = TextEditor(self.transaction_manager, self.memory_manager)
-        self.search_engine: SearchEngine = SearchEngine(self.memory_manager, config.gpu_enabled)
+        self.search_engine: SearchEngine = SearchEngine(
+            self.memory_manager, config.gpu_enabled, config.gpu_min_bytes
+        )
         self.version_control: VersionControl = VersionControl()
-        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=config.worker_count)
+        self.executor: ThreadPoolExecutor = _acquire_executor(config.worker_count)
+        self._pending_writes: list[tuple[Path, str, str, bool, asyncio.Future]] = []
+        self._flush_scheduled: bool = False
+        self._closed: bool = False
+
+    async def __aenter__(self) -> FluxEngine:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
 
     async def read_file(self, path: str, encoding: str | None = None, 
                        start_line: int | None = None, end_line: int | None = None) -> str:
         file_path: Path = Path(path)
         
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {path}")
+        # One stat serves both the existence check and the size
+        try:
+            file_size: int = os.stat(file_path).st_size
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {path}") from None
         
         # Skip memory mapping for small files or partial reads
-        file_size: int = file_path.stat().st_size
         use_mmap: bool = (
             file_size > self.config.memory_mapped_threshold and 
             start_line is None and 
@@ -63,15 +197,21 @@ class FluxEngine:
                         simple_mode: bool = False) -> str:
         file_path: Path = Path(path)
         
-        if create_dirs and not file_path.parent.exists():
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-        
         # Simple mode for small files - skip transactions
         if simple_mode or len(content) < 10000:  # < 10KB
-            # Direct write without transaction overhead
-            file_path.write_text(content, encoding=encoding)
+            # Direct write without transaction overhead, off the event loop;
+            # missing parents are created there too, only when the open fails
+            if len(content) < _BATCH_WRITE_LIMIT:
+                await self._submit_write(file_path, content, encoding, create_dirs)
+            else:
+                await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self._write_direct, file_path, content, encoding, create_dirs
+                )
             return f"Successfully wrote to {path}"
         
+        if create_dirs:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+        
         # Full transaction mode for larger files
         transaction_id: str = await self.transaction_manager.begin()
         
@@ -83,41 +223,204 @@ class FluxEngine:
             await self.transaction_manager.rollback(transaction_id)
             raise Exception(f"Failed to write file: {e}")
 
-    async def search(self, path: str, pattern: str, is_regex: bool = False, 
+    async def write_file_from(self, path: str, src_path: str, create_dirs: bool = True) -> str:
+        file_path: Path = Path(path)
+        source: Path = Path(src_path)
+        
+        try:
+            source_stat: os.stat_result = os.stat(source)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {src_path}") from None
+        
+        # Truncating the destination would wipe a source that is the same file
+        try:
+            if os.path.samestat(source_stat, os.stat(file_path)):
+                return f"Successfully wrote to {path}"
+        except FileNotFoundError:
+            pass
+        
+        if create_dirs:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        await asyncio.get_running_loop().run_in_executor(
+            self.executor, self._copy_direct, source, file_path
+        )
+        return f"Successfully wrote to {path}"
+
+    def _copy_direct(self, source: Path, file_path: Path) -> None:
+        # Bytes move in-kernel; nothing is decoded or re-encoded in Python.
+        # FileHandler already falls back to shutil.copyfile (fcopyfile on
+        # macOS) only when copy_file_range is unsupported.
+        self.file_handler._copy_file_sync(source, file_path)
+
+    async def _submit_write(self, file_path: Path, content: str, encoding: str,
+                            create_dirs: bool = True) -> None:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending_writes.append((file_path, content, encoding, create_dirs, future))
+        
+        # Flush when the batch is full, otherwise on the next loop tick so a
+        # burst of concurrent small writes shares a single executor hop
+        if len(self._pending_writes) >= _BATCH_WRITE_SIZE:
+            self._flush_writes()
+        elif not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self._flush_writes)
+        
+        await future
+
+    def _flush_writes(self) -> None:
+        self._flush_scheduled = False
+        batch: list[tuple[Path, str, str, bool, asyncio.Future]] = self._pending_writes
+        self._pending_writes = []
+        if not batch:
+            return
+        
+        def write_batch() -> list[BaseException | None]:
+            errors: list[BaseException | None] = []
+            for file_path, content, encoding, create_dirs, _ in batch:
+                try:
+                    self._write_direct(file_path, content, encoding, create_dirs)
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(e)
+            return errors
+        
+        def resolve(done: asyncio.Future) -> None:
+            errors: list[BaseException | None]
+            if done.cancelled():
+                # Executor shut down with cancel_futures before the batch ran
+                errors = [asyncio.CancelledError()] * len(batch)
+            else:
+                try:
+                    errors = done.result()
+                except Exception as e:
+                    errors = [e] * len(batch)
+            for (_, _, _, _, future), error in zip(batch, errors):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(None)
+                elif isinstance(error, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(error)
+        
+        asyncio.get_running_loop().run_in_executor(
+            self.executor, write_batch
+        ).add_done_callback(resolve)
+
+    def _write_direct(self, file_path: Path, content: str, encoding: str,
+                      create_dirs: bool = False) -> None:
+        data: memoryview = memoryview(content.encode(encoding))
+        chunk_size: int = self.config.chunk_size
+
+        # Raw fd writes skip the text-mode buffer; os.write may write short
+        flags: int = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        try:
+            fd: int = os.open(file_path, flags, 0o644)
+        except FileNotFoundError:
+            if not create_dirs:
+                raise
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(file_path, flags, 0o644)
+        try:
+            offset: int = 0
+            while offset < len(data):
+                offset += os.write(fd, data[offset:offset + chunk_size])
+        finally:
+            os.close(fd)
+
+    async def search(self, path: str, pattern: str, is_regex: bool = False,
                     case_sensitive: bool = True, whole_word: bool = False,
                     simple_mode: bool = False) -> list[dict[str, Any]]:
         file_path: Path = Path(path)
         
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {path}")
+        try:
+            file_size: int = os.stat(file_path).st_size
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {path}") from None
+        
+        # Alternations of plain strings skip the regex engine entirely
+        literals: tuple[str, ...] | None = None
+        if is_regex and case_sensitive and not whole_word and MULTI_PATTERN_AVAILABLE:
+            literals = _literal_alternatives(pattern)
+        
+        # Simple mode for small files and simple patterns. Bytes-level
+        # IGNORECASE only folds ASCII, so non-ASCII case-insensitive
+        # patterns go through the full search engine.
+        use_simple: bool = literals is not None or (
+            (simple_mode or (file_size < 1024 * 1024 and not is_regex)) and
+            (case_sensitive or pattern.isascii())
+        )
         
-        # Simple mode for small files and simple patterns
-        if simple_mode or (file_path.stat().st_size < 100000 and not is_regex):
+        if use_simple:
             # Fast path for simple searches
-            content: str = file_path.read_text()
             results: list[dict[str, Any]] = []
             
-            search_pattern: str = pattern if case_sensitive else pattern.lower()
-            search_content: str = content if case_sensitive else content.lower()
+            if file_size == 0:
+                return results
             
-            lines: list[str] = search_content.splitlines()
-            for line_num, line in enumerate(lines):
-                if search_pattern in line:
-                    column: int = line.find(search_pattern)
+            needle: bytes = pattern.encode('utf-8')
+            if not needle:
+                return results
+
+            # Scan the mapping directly; only matched windows get decoded
+            with open(file_path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                spans: Iterator[tuple[int, int]]
+                caseless: bool = pattern.lower() == pattern.upper()
+                if literals is not None:
+                    spans = iter(search_multi(mm, compile_multi_pattern(literals)))
+                elif (case_sensitive or caseless) and not whole_word:
+                    spans = _find_literal(mm, needle)
+                else:
+                    regex: re.Pattern = _compile(re.escape(needle), not case_sensitive, whole_word)
+                    spans = (match.span() for match in regex.finditer(mm))
+                
+                # Matches arrive in order, so the newline scan only has to
+                # advance as far as the latest match. Columns and context
+                # count characters, as SearchEngine reports them; each line
+                # is decoded only as far as its last match.
+                line_num: int = 0
+                line_start: int = 0
+                column: int = 0
+                counted: int = 0
+                newline: int = mm.find(b'\n')
+                for start, end in spans:
+                    if newline != -1 and newline < start:
+                        while newline != -1 and newline < start:
+                            line_num += 1
+                            line_start = newline + 1
+                            newline = mm.find(b'\n', line_start)
+                        column, counted = 0, line_start
+                    line_end: int = newline if newline != -1 else file_size
+                    column += len(mm[counted:start].decode('utf-8', errors='replace'))
+                    counted = start
                     results.append({
                         'line_number': line_num,
                         'column': column,
-                        'match_text': pattern,
-                        'context_before': line[:column][-50:],
-                        'context_after': line[column + len(pattern):][:50],
-                        'byte_offset': sum(len(l) + 1 for l in lines[:line_num]) + column
+                        'match_text': mm[start:end].decode('utf-8', errors='replace'),
+                        'context_before': mm[max(line_start, start - _CONTEXT_BYTES):start].decode(
+                            'utf-8', errors='replace'
+                        )[-50:],
+                        'context_after': mm[end:min(line_end, end + _CONTEXT_BYTES)].rstrip(b'\r').decode(
+                            'utf-8', errors='replace'
+                        )[:50],
+                        'byte_offset': start
                     })
             
             return results
         
         # Full search engine for complex cases
+        regex: re.Pattern | None = None
+        if is_regex:
+            regex = _compile(pattern, not case_sensitive, False)
+        elif whole_word:
+            regex = _compile(re.escape(pattern), not case_sensitive, True)
+        
         return await self.search_engine.search(
-            file_path, pattern, is_regex, case_sensitive, whole_word
+            file_path, pattern, is_regex, case_sensitive, whole_word, regex=regex
         )
 
 
@@ -127,126 +430,112 @@ class FluxEngine:
                          auto_checkpoint: bool = False, dry_run: bool = False,
                          batch_mode: bool = False) -> str:
         """Advanced text replacement with hierarchical selection."""
+        file_path: Path = Path(path)
+        error: Exception
+        error_message: str
+        
         try:
-            file_path: Path = Path(path)
-            
             if not file_path.exists():
                 raise FileNotFoundError(f"File not found: {path}")
             
-            try:
-                results: dict[str, Any] = await self.text_editor.text_replace(
-                    file_path, highlight, replace_with, checkpoint, auto_checkpoint, 
-                    dry_run=dry_run, batch_mode=batch_mode
-                )
-                
-                if dry_run:
-                    return results["diff_output"]
-                    
-                return results["message"]
-                
-            except ValueError as e:
-                error_str: str = str(e).lower()
+            results: dict[str, Any] = await self.text_editor.text_replace(
+                file_path, highlight, replace_with, checkpoint, auto_checkpoint, 
+                dry_run=dry_run, batch_mode=batch_mode
+            )
+            
+            if dry_run:
+                return results["diff_output"]
                 
-                if "could not find" in error_str:
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content: str = f.read()
-                        
-                        import re
-                        class_count: int = len(re.findall(r'^\s*class\s+(\w+)', content, re.MULTILINE))
-                        func_count: int = len(re.findall(r'^\s*def\s+(\w+)', content, re.MULTILINE))
-                        
-                        similar_targets: list[tuple[str, float]] = self.text_editor.find_similar_targets(
-                            file_path, highlight if isinstance(highlight, str) else highlight.get("target", "")
-                        )
-                        
-                        suggestions: str = ""
-                        if similar_targets:
-                            suggestions = "\n🔍 Similar targets found:"
-                            for target, score in similar_targets:
-                                suggestions += f"\n  → '{target}' (similarity: {score:.0%})"
-                            
-                            if score := similar_targets[0][1] >= 0.85:
-                                suggestions += f"\n\n🔄 Try with: highlight='{similar_targets[0][0]}'"
-                        
-                        help_message: str = (
-                            f"ERROR: Target not found in {path}\n\n"
-                            f"CORRECT FORMAT: Use 'ClassName' or 'ClassName.method_name' format.\n"
-                            f"DO NOT include 'class' or 'def' keywords, parentheses, or colons.\n\n"
-                            f"EXAMPLES:\n"
-                            f"  highlight='MyClass'        ✓ CORRECT\n"
-                            f"  highlight='MyClass.method' ✓ CORRECT\n"
-                            f"  highlight='class MyClass'  ✗ INCORRECT (don't include 'class')\n"
-                            f"  highlight='def method()'   ✗ INCORRECT (don't include 'def' or parentheses)\n\n"
-                            f"This file contains approximately {class_count} classes and {func_count} functions.\n\n"
-                            f"{suggestions}\n\n"
-                            f"ERROR DETAILS: {e}"
-                        )
-                        
-                        if isinstance(highlight, str) and "." not in highlight:
-                            recovery_result: dict[str, Any] | None = await self.text_editor.try_fuzzy_recovery(
-                                file_path, highlight, replace_with, auto_checkpoint, 
-                                threshold=0.85, dry_run=dry_run
-                            )
-                            
-                            if recovery_result:
-                                recovery_msg: str = (
-                                    f"🛠️ RECOVERY SUGGESTION: Found similar target '{recovery_result['target']}'.\n\n"
-                                    f"Would you like to use this target instead?\n"
-                                    f"Try with: highlight='{recovery_result['target']}'"
-                                )
-                                return recovery_msg
-                                
-                    except Exception as scan_error:
-                        help_message: str = (
-                            f"ERROR: Target not found in {path}\n\n"
-                            f"CORRECT FORMAT: Use 'ClassName' or 'ClassName.method_name' format.\n"
-                            f"DO NOT include 'class' or 'def' keywords, parentheses, or colons.\n\n"
-                            f"EXAMPLES:\n"
-                            f"  highlight='MyClass'        ✓ CORRECT\n"
-                            f"  highlight='MyClass.method' ✓ CORRECT\n"
-                            f"  highlight='class MyClass'  ✗ INCORRECT (don't include 'class')\n"
-                            f"  highlight='def method()'   ✗ INCORRECT (don't include 'def' or parentheses)\n\n"
-                            f"ERROR DETAILS: {e}"
-                        )
-                        
-                    raise Exception(help_message)
-                    
-                elif "invalid python" in error_str or "syntax error" in error_str:
-                    import re
-                    error_line_match: re.Match | None = re.search(r'line (\d+)', error_str)
-                    line_info: str = f"around line {error_line_match.group(1)}" if error_line_match else ""
-                    
-                    help_message: str = (
-                        f"SYNTAX ERROR: The replacement code contains Python syntax errors {line_info}.\n\n"
-                        f"ERROR DETAILS: {e}\n\n"
-                        f"Try using triple quotes for multi-line code: replace_with=\"\"\"def method():\\n    ..."
+            return results["message"]
+            
+        except FileNotFoundError as e:
+            error, error_message = e, str(e)
+        except ValueError as e:
+            error = e
+            error_kind: str = _classify_error(str(e).lower())
+            fields: dict[str, Any] = {'path': path, 'error': e}
+            
+            if error_kind == _TARGET_NOT_FOUND:
+                try:
+                    recovery_message: str | None = await self._try_recovery(
+                        file_path, highlight, replace_with, auto_checkpoint, dry_run
                     )
-                    raise Exception(help_message)
-                else:
-                    raise Exception(f"Failed to replace text: {e}")
-            except Exception as e:
-                error_details: str = str(e)
-                if hasattr(e, '__traceback__'):
-                    import traceback
-                    error_details = f"{error_details}\n\nDetails: {traceback.format_exc()}"
-                
-                raise Exception(f"Failed to replace text: {error_details}")
-                
-        except Exception as outer_e:
-            try:
-                error_message: str = str(outer_e)
-                if hasattr(outer_e, '__traceback__'):
-                    import logging
-                    import traceback
-                    logging.error(f"text_replace error: {traceback.format_exc()}")
-                else:
-                    import logging
-                    logging.error(f"text_replace error: {error_message}")
+                    if recovery_message:
+                        return recovery_message
                     
-                return f"ERROR: {error_message}"
-            except:
-                return "ERROR: Failed to replace text. See server logs for details."
+                    fields.update(await self._scan_targets(file_path, highlight))
+                except Exception:
+                    error_kind = _TARGET_NOT_FOUND_BRIEF
+            elif error_kind == _SYNTAX_ERROR:
+                error_line_match: re.Match | None = _LINE_NO_RE.search(str(e).lower())
+                fields['line_info'] = f"around line {error_line_match.group(1)}" if error_line_match else ""
+            
+            error_message = _ERROR_HELP[error_kind].format(**fields)
+        except Exception as e:
+            error = e
+            error_message = f"Failed to replace text: {type(e).__name__}: {e}"
+            if self.config.debug_mode:
+                error_message = f"{error_message}\n\nDetails: {traceback.format_exc()}"
+        
+        # exc_info defers traceback formatting to the log handler
+        logging.error("text_replace error: %s", error_message, exc_info=error)
+        return f"ERROR: {error_message}"
+
+    async def _scan_targets(self, file_path: Path, highlight: str | dict[str, Any]) -> dict[str, Any]:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content: str = f.read()
+        
+        similar_targets: list[tuple[str, float]] = await self.text_editor.find_similar_targets(
+            file_path, highlight if isinstance(highlight, str) else highlight.get("target", ""), content
+        )
+        
+        suggestions: str = ""
+        if similar_targets:
+            suggestions = "\n🔍 Similar targets found:"
+            for target, score in similar_targets:
+                suggestions += f"\n  → '{target}' (similarity: {score:.0%})"
+            
+            top_target: tuple[str, float] = similar_targets[0]
+            if top_target[1] >= 0.85:
+                suggestions += f"\n\n🔄 Try with: highlight='{top_target[0]}'"
+        
+        return {
+            'class_count': len(_CLASS_RE.findall(content)),
+            'func_count': len(_DEF_RE.findall(content)),
+            'suggestions': suggestions
+        }
+
+    async def _try_recovery(self, file_path: Path, highlight: str | dict[str, Any],
+                           replace_with: str, auto_checkpoint: bool, dry_run: bool) -> str | None:
+        if not isinstance(highlight, str) or "." in highlight:
+            return None
+        
+        recovery_result: dict[str, Any] | None = await self.text_editor.try_fuzzy_recovery(
+            file_path, highlight, replace_with, auto_checkpoint, 
+            threshold=0.85, dry_run=dry_run
+        )
+        
+        if not recovery_result:
+            return None
+        
+        return _RECOVERY_HELP.format(target=recovery_result['target'])
+
+    async def aclose(self) -> None:
+        # Explicit shutdown; queued work is cancelled rather than awaited
+        if self._closed:
+            return
+        self._closed = True
+        
+        for _, _, _, _, future in self._pending_writes:
+            future.cancel()
+        self._pending_writes = []
+        _release_executor(self.executor)
+        
+        await self.transaction_manager.aclose()
+        self.memory_manager.close_all()
+        self.search_engine.close()
 
     def __del__(self) -> None:
-        self.executor.shutdown(wait=True)
+        # Never tear down from the collector; just flag the missed aclose()
+        if not getattr(self, '_closed', True):
+            warnings.warn(f"unclosed {self!r}; call aclose()", ResourceWarning, stacklevel=2)
@@ -1,11 +1,37 @@
 from __future__ import annotations
 
+import os
+import sys
 import mmap
 import asyncio
+import threading
 from pathlib import Path
 from typing import Any
 from dataclasses import dataclass, field
 from collections import OrderedDict
+import numpy as np
+
+from flux_mcp.utils.encoding_detector import detect_sample_encoding
+
+# Mappings up to this size are prefetched whole as soon as they are created
+_WILLNEED_MAX_BYTES: int = 256 * 1024 * 1024
+
+# Full reads from this size up are split across io_thread_count preads
+_PARALLEL_READ_THRESHOLD: int = 64 * 1024 * 1024
+
+# Detected encodings are a few bytes each, so bound them by count
+_ENCODING_CACHE_ENTRIES: int = 4096
+
+# Raw bytes kept beside the text decoded from them, for writes that hand
+# the same text back; both count against the budget
+_DECODED_CACHE_BYTES: int = 64 * 1024 * 1024
+
+# Codecs where encoding decoded text reproduces the original bytes exactly
+_ROUND_TRIP_ENCODINGS: frozenset[str] = frozenset(('utf-8', 'ascii', 'latin-1'))
+
+
+def _decoded_cost(text: str, raw: bytes) -> int:
+    return sys.getsizeof(text) + len(raw)
 
 
 @dataclass 
@@ -13,6 +39,7 @@ class MemoryConfig:
     memory_mapped_threshold: int
     chunk_size: int
     cache_size: int
+    io_thread_count: int = 4
     
     
 @dataclass
@@ -21,7 +48,16 @@ class MappedFile:
     mmap_obj: mmap.mmap
     file_handle: Any
     size: int
-    line_index: list[int] = field(default_factory=list)
+    line_index: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    # Zero-copy view over mmap_obj; must be released before the mmap closes
+    view: memoryview | None = None
+    
+    def close(self) -> None:
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        self.mmap_obj.close()
+        self.file_handle.close()
     
 
 class MemoryManager:
@@ -31,30 +67,122 @@ class MemoryManager:
         self.cache: OrderedDict[str, bytes] = OrderedDict()
         self.cache_size: int = 0
         self.lock: asyncio.Lock = asyncio.Lock()
+        # Cache updates never block, so an uncontended thread lock is enough
+        # and also covers callers running on executor threads
+        self.cache_lock: threading.Lock = threading.Lock()
+        # Reverse index so a write invalidates its own entries without
+        # scanning every key in the cache
+        self.cache_paths: dict[str, Path] = {}
+        self.path_keys: dict[Path, set[str]] = {}
+        # Keyed by (path, st_mtime_ns, st_size) so a rewritten file misses
+        self.encoding_cache: OrderedDict[tuple[Path, int, int], str] = OrderedDict()
+        # path -> (text, encoding, raw bytes the text was decoded from)
+        self.decoded_cache: OrderedDict[Path, tuple[str, str, bytes]] = OrderedDict()
+        self.decoded_size: int = 0
 
     async def read_mapped_file(self, file_path: Path, encoding: str | None = None,
                              start_line: int | None = None, end_line: int | None = None) -> str:
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        
         async with self.lock:
-            if file_path not in self.mapped_files:
-                await self._map_file(file_path)
+            mapped_file: MappedFile | None = self.mapped_files.get(file_path)
+            
+            # A one-shot full read gains nothing from a mapping, so read and
+            # decode off the event loop without setting one up
+            if start_line is None and end_line is None:
+                if mapped_file is None:
+                    return await self._read_full(file_path, encoding)
+                
+                # Full reads touch every page; start kernel readahead up front
+                self._advise(mapped_file, 'MADV_SEQUENTIAL', 'MADV_WILLNEED')
+                return await loop.run_in_executor(
+                    None, self._decode_sync, mapped_file.mmap_obj, encoding
+                )
             
-            mapped_file: MappedFile = self.mapped_files[file_path]
+            if mapped_file is None:
+                await self._map_file(file_path)
+                mapped_file = self.mapped_files[file_path]
             
             # Build line index if not exists
-            if not mapped_file.line_index:
+            if len(mapped_file.line_index) == 0:
                 await self._build_line_index(mapped_file)
             
-            # Get content based on line range
-            if start_line is not None or end_line is not None:
-                content: bytes = await self._read_lines(mapped_file, start_line, end_line)
-            else:
-                content: bytes = mapped_file.mmap_obj[:]
-            
-            # Handle encoding
-            if encoding is None:
-                encoding = self._detect_encoding(content[:1024])
-            
-            return content.decode(encoding)
+            # Decode straight out of the mapping; the slice is released
+            # before the lock drops so the mmap can still be closed
+            with await self._read_lines(mapped_file, start_line, end_line) as content:
+                # Handle encoding
+                if encoding is None:
+                    encoding = detect_sample_encoding(bytes(content[:1024]))
+                
+                return str(content, encoding)
+
+    async def _read_full(self, file_path: Path, encoding: str | None) -> str:
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        size: int = os.stat(file_path).st_size
+        workers: int = max(1, self.config.io_thread_count)
+        if size < _PARALLEL_READ_THRESHOLD or workers == 1:
+            return await loop.run_in_executor(None, self._read_full_sync, file_path, encoding)
+        
+        # Several positional reads share one fd and fill disjoint ranges of
+        # one buffer; decoding then runs off the event loop like any read
+        chunk: int = -(-size // workers)
+        content: bytearray = bytearray(size)
+        fd: int = os.open(file_path, os.O_RDONLY)
+        try:
+            with memoryview(content) as view:
+                await asyncio.gather(*(
+                    loop.run_in_executor(
+                        None, self._read_range_sync, file_path, fd,
+                        view[offset:offset + chunk], offset
+                    )
+                    for offset in range(0, size, chunk)
+                ))
+        finally:
+            os.close(fd)
+        
+        return await loop.run_in_executor(None, self._decode_sync, content, encoding)
+
+    def _read_range_sync(self, file_path: Path, fd: int, window: memoryview, offset: int) -> None:
+        filled: int = 0
+        while filled < len(window):
+            read: int = self._pread_into(fd, window[filled:], offset + filled)
+            if not read:
+                raise EOFError(f"File truncated during read: {file_path}")
+            filled += read
+
+    def _read_full_sync(self, file_path: Path, encoding: str | None) -> str:
+        fd: int = os.open(file_path, os.O_RDONLY)
+        try:
+            size: int = os.fstat(fd).st_size
+            self._fadvise_sequential(fd, size)
+            content: bytearray = bytearray(size)
+            filled: int = 0
+            with memoryview(content) as view:
+                while filled < size:
+                    read: int = self._pread_into(fd, view[filled:], filled)
+                    if not read:
+                        break
+                    filled += read
+            del content[filled:]
+        finally:
+            os.close(fd)
+        
+        return self._decode_sync(content, encoding)
+
+    def _pread_into(self, fd: int, window: memoryview, offset: int) -> int:
+        # preadv fills the buffer in place; older macOS builds lack it
+        if hasattr(os, 'preadv'):
+            return os.preadv(fd, [window], offset)
+        
+        chunk: bytes = os.pread(fd, len(window), offset)
+        window[:len(chunk)] = chunk
+        return len(chunk)
+
+    def _decode_sync(self, content: Any, encoding: str | None) -> str:
+        if encoding is None:
+            encoding = detect_sample_encoding(bytes(content[:1024]))
+        
+        return str(content, encoding)
 
     async def _map_file(self, file_path: Path) -> None:
         loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
@@ -65,7 +193,10 @@ class MemoryManager:
 
     def _map_file_sync(self, file_path: Path) -> MappedFile:
         file_handle: Any = open(file_path, 'rb')
-        file_size: int = file_path.stat().st_size
+        file_size: int = os.fstat(file_handle.fileno()).st_size
+        
+        # The first pass over a new mapping is the sequential line-index scan
+        self._fadvise_sequential(file_handle.fileno(), file_size)
         
         if file_size == 0:
             mmap_obj: mmap.mmap = mmap.mmap(-1, 0)
@@ -76,35 +207,95 @@ class MemoryManager:
                 access=mmap.ACCESS_READ
             )
         
-        return MappedFile(
+        mapped_file: MappedFile = MappedFile(
             path=file_path,
             mmap_obj=mmap_obj,
             file_handle=file_handle,
-            size=file_size
+            size=file_size,
+            view=memoryview(mmap_obj)
         )
+        
+        if file_size <= _WILLNEED_MAX_BYTES:
+            self._advise(mapped_file, 'MADV_SEQUENTIAL', 'MADV_WILLNEED')
+        else:
+            self._advise(mapped_file, 'MADV_SEQUENTIAL')
+        
+        return mapped_file
+
+    def _advise(self, mapped_file: MappedFile, *advice: str) -> None:
+        # MADV_* constants vary by platform; advice is only a hint
+        if mapped_file.size == 0:
+            return
+        
+        for name in advice:
+            value: int | None = getattr(mmap, name, None)
+            if value is None:
+                continue
+            try:
+                mapped_file.mmap_obj.madvise(value)
+            except OSError:
+                pass
+
+    def _fadvise_sequential(self, fd: int, size: int) -> None:
+        # posix_fadvise is Linux-only; macOS readahead needs no hint
+        if size == 0 or not hasattr(os, 'posix_fadvise'):
+            return
+        
+        try:
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+    def read_page_aligned(self, file_path: Path) -> tuple[mmap.mmap, int]:
+        # Anonymous mappings start on a page boundary and are sized in whole
+        # pages, which is what Metal needs to wrap memory without copying
+        size: int = file_path.stat().st_size
+        pages: int = max(-(-size // mmap.PAGESIZE), 1)
+        buffer: mmap.mmap = mmap.mmap(-1, pages * mmap.PAGESIZE)
+        
+        with open(file_path, 'rb', buffering=0) as f, memoryview(buffer) as view:
+            filled: int = 0
+            while filled < size:
+                with view[filled:size] as window:
+                    read: int = f.readinto(window)
+                if not read:
+                    break
+                filled += read
+        
+        return buffer, filled
 
     async def _build_line_index(self, mapped_file: MappedFile) -> None:
         loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
-        line_index: list[int] = await loop.run_in_executor(
+        line_index: np.ndarray = await loop.run_in_executor(
             None, self._build_index_sync, mapped_file.mmap_obj
         )
         mapped_file.line_index = line_index
-
-    def _build_index_sync(self, mmap_obj: mmap.mmap) -> list[int]:
-        line_index: list[int] = [0]
-        position: int = 0
         
-        while True:
-            line_end: int = mmap_obj.find(b'\n', position)
-            if line_end == -1:
-                break
-            position = line_end + 1
-            line_index.append(position)
+        # Later line-range reads jump around; stop aggressive readahead
+        self._advise(mapped_file, 'MADV_NORMAL')
+
+    def line_offsets(self, buffer: Any, size: int) -> np.ndarray:
+        # Start offset of every line in the first size bytes of buffer
+        return self._build_index_sync(buffer, size)
+
+    def _build_index_sync(self, mmap_obj: mmap.mmap, size: int = -1) -> np.ndarray:
+        # Vectorised newline scan over a zero-copy view, in chunk_size blocks
+        # so the temporary comparison mask stays bounded
+        data: np.ndarray = np.frombuffer(mmap_obj, dtype=np.uint8, count=size)
+        block: int = max(self.config.chunk_size, 1)
+        newlines: list[np.ndarray] = [
+            np.flatnonzero(data[offset:offset + block] == 0x0A) + offset
+            for offset in range(0, len(data), block)
+        ]
+        del data
         
+        line_index: np.ndarray = np.concatenate(
+            [np.zeros(1, dtype=np.int64)] + [positions + 1 for positions in newlines]
+        ).astype(np.int64, copy=False)
         return line_index
 
     async def _read_lines(self, mapped_file: MappedFile, 
-                         start_line: int | None, end_line: int | None) -> bytes:
+                         start_line: int | None, end_line: int | None) -> memoryview:
         line_count: int = len(mapped_file.line_index)
         
         if start_line is None:
@@ -115,26 +306,14 @@ class MemoryManager:
         start_line = max(0, min(start_line, line_count - 1))
         end_line = max(0, min(end_line, line_count - 1))
         
-        start_pos: int = mapped_file.line_index[start_line]
+        start_pos: int = int(mapped_file.line_index[start_line])
         
         if end_line >= line_count - 1:
             end_pos: int = mapped_file.size
         else:
-            end_pos: int = mapped_file.line_index[end_line + 1]
+            end_pos: int = int(mapped_file.line_index[end_line + 1])
         
-        return mapped_file.mmap_obj[start_pos:end_pos]
-
-    def _detect_encoding(self, sample: bytes) -> str:
-        # Simple encoding detection (can be enhanced)
-        try:
-            sample.decode('utf-8')
-            return 'utf-8'
-        except UnicodeDecodeError:
-            try:
-                sample.decode('utf-16')
-                return 'utf-16'
-            except UnicodeDecodeError:
-                return 'latin-1'
+        return mapped_file.view[start_pos:end_pos]
 
     async def read_chunks(self, file_path: Path, chunk_size: int | None = None) -> AsyncIterator[bytes]:
         if chunk_size is None:
@@ -149,44 +328,116 @@ class MemoryManager:
                     break
                 yield chunk
 
-    async def cache_put(self, key: str, value: bytes) -> None:
-        async with self.lock:
+    def cache_put_sync(self, key: str, value: bytes, file_path: Path | None = None) -> None:
+        with self.cache_lock:
             # Remove if already exists
             if key in self.cache:
-                old_value: bytes = self.cache.pop(key)
-                self.cache_size -= len(old_value)
+                self._cache_discard(key)
             
             # Check cache size limit
             while self.cache_size + len(value) > self.config.cache_size and self.cache:
-                oldest_key: str
-                oldest_value: bytes
-                oldest_key, oldest_value = self.cache.popitem(last=False)
-                self.cache_size -= len(oldest_value)
+                self._cache_discard(next(iter(self.cache)))
             
             # Add new item
             self.cache[key] = value
             self.cache_size += len(value)
+            if file_path is not None:
+                self.cache_paths[key] = file_path
+                self.path_keys.setdefault(file_path, set()).add(key)
 
-    async def cache_get(self, key: str) -> bytes | None:
-        async with self.lock:
-            if key in self.cache:
+    def _cache_discard(self, key: str) -> None:
+        # Caller holds cache_lock
+        value: bytes | None = self.cache.pop(key, None)
+        if value is not None:
+            self.cache_size -= len(value)
+        
+        file_path: Path | None = self.cache_paths.pop(key, None)
+        if file_path is not None:
+            keys: set[str] = self.path_keys[file_path]
+            keys.discard(key)
+            if not keys:
+                del self.path_keys[file_path]
+
+    def decoded_put(self, file_path: Path, text: str, encoding: str, raw: bytes) -> None:
+        # An entry also keeps its text alive, which for non-ASCII content
+        # takes up to four times the bytes it was decoded from
+        cost: int = _decoded_cost(text, raw)
+        if encoding not in _ROUND_TRIP_ENCODINGS or cost > _DECODED_CACHE_BYTES:
+            return
+        
+        with self.cache_lock:
+            self._decoded_discard(file_path)
+            while self.decoded_size + cost > _DECODED_CACHE_BYTES and self.decoded_cache:
+                self._decoded_discard(next(iter(self.decoded_cache)))
+            self.decoded_cache[file_path] = (text, encoding, raw)
+            self.decoded_size += cost
+
+    def encoded_get(self, file_path: Path, text: str, encoding: str) -> bytes | None:
+        # Only the very object that was decoded qualifies; equal text would
+        # need a full comparison, which costs as much as encoding it
+        with self.cache_lock:
+            entry: tuple[str, str, bytes] | None = self.decoded_cache.get(file_path)
+            if entry is None or entry[0] is not text or entry[1] != encoding:
+                return None
+            self.decoded_cache.move_to_end(file_path)
+            return entry[2]
+
+    def _decoded_discard(self, file_path: Path) -> None:
+        # Caller holds cache_lock
+        entry: tuple[str, str, bytes] | None = self.decoded_cache.pop(file_path, None)
+        if entry is not None:
+            self.decoded_size -= _decoded_cost(entry[0], entry[2])
+
+    def cache_invalidate_path(self, file_path: Path) -> None:
+        with self.cache_lock:
+            self._decoded_discard(file_path)
+            for key in self.path_keys.pop(file_path, ()):
+                self.cache_paths.pop(key, None)
+                value: bytes | None = self.cache.pop(key, None)
+                if value is not None:
+                    self.cache_size -= len(value)
+
+    def cache_get_sync(self, key: str) -> bytes | None:
+        with self.cache_lock:
+            value: bytes | None = self.cache.get(key)
+            if value is not None:
                 # Move to end (LRU)
-                value: bytes = self.cache.pop(key)
-                self.cache[key] = value
-                return value
-            return None
+                self.cache.move_to_end(key)
+            return value
+
+    def encoding_cache_get(self, key: tuple[Path, int, int]) -> str | None:
+        with self.cache_lock:
+            encoding: str | None = self.encoding_cache.get(key)
+            if encoding is not None:
+                self.encoding_cache.move_to_end(key)
+            return encoding
+
+    def encoding_cache_put(self, key: tuple[Path, int, int], encoding: str) -> None:
+        with self.cache_lock:
+            self.encoding_cache[key] = encoding
+            self.encoding_cache.move_to_end(key)
+            while len(self.encoding_cache) > _ENCODING_CACHE_ENTRIES:
+                self.encoding_cache.popitem(last=False)
+
+    async def cache_put(self, key: str, value: bytes, file_path: Path | None = None) -> None:
+        self.cache_put_sync(key, value, file_path)
+
+    async def cache_get(self, key: str) -> bytes | None:
+        return self.cache_get_sync(key)
 
     def close_mapped_file(self, file_path: Path) -> None:
         if file_path in self.mapped_files:
             mapped_file: MappedFile = self.mapped_files.pop(file_path)
-            mapped_file.mmap_obj.close()
-            mapped_file.file_handle.close()
+            mapped_file.close()
 
-    def __del__(self) -> None:
-        for mapped_file in self.mapped_files.values():
+    def close_all(self) -> None:
+        # Explicit counterpart to per-file close; mmap objects left to the
+        # collector still close themselves, but not at a predictable time
+        mapped_files: list[MappedFile] = list(self.mapped_files.values())
+        self.mapped_files.clear()
+        for mapped_file in mapped_files:
             try:
-                mapped_file.mmap_obj.close()
-                mapped_file.file_handle.close()
+                mapped_file.close()
             except Exception:
                 pass
 
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import os
 import re
 import sys
+import mmap
+import codecs
+import asyncio
 import platform
-from typing import Any
-from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Iterator
+from dataclasses import dataclass, field
 import numpy as np
 import multiprocessing
 
+from flux_mcp.core._bmh import NUMBA_AVAILABLE, bmh_all, skip_table
+from flux_mcp.utils.regex_cache import compile_regex
+
 # Check if we're on macOS before importing Metal
 if platform.system() == "Darwin":
     try:
@@ -20,6 +28,56 @@ if platform.system() == "Darwin":
 else:
     METAL_AVAILABLE = False
 
+# Multi-literal matchers, best first: Hyperscan scans for every pattern in
+# one SIMD pass, pyahocorasick in one automaton walk
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Neither matcher needs a GPU
+MULTI_PATTERN_AVAILABLE: bool = HYPERSCAN_AVAILABLE or AHOCORASICK_AVAILABLE
+
+
+# Start positions scanned per GPU thread; must match TILE_SIZE in the shader
+_KERNEL_TILE_SIZE: int = 16
+# Pooled buffers kept per power-of-two size class
+_BUFFERS_PER_SIZE: int = 2
+# newCommandQueue allows 64 in-flight command buffers; beyond that
+# commandBuffer() blocks until the GPU drains one
+_DEFAULT_QUEUE_DEPTH: int = 1024
+_COUNT_KERNEL: str = "count_matches"
+_SCAN_KERNEL: str = "scan_groups"
+_WRITE_KERNEL: str = "write_matches"
+# setBytes:length:atIndex: only accepts up to 4KB of inline data
+_INLINE_BYTES_LIMIT: int = 4096
+# Shorter literals gain little from skipping; bytes.find is memchr-backed
+_BMH_MIN_LENGTH: int = 4
+_SIMPLE_RE: re.Pattern = re.compile(r'^[a-zA-Z0-9\s]+$')
+# The str-only automaton walks a mapping this many bytes at a time
+_AUTOMATON_WINDOW_BYTES: int = 4 * 1024 * 1024
+
+# Shared accelerators, keyed by (pid, gpu_min_bytes) so a forked child builds
+# its own instead of inheriting one set up with Metal disabled
+_INSTANCES: dict[tuple[int, int], MetalAccelerator] = {}
+
+
+def _objc_result(result: Any) -> Any:
+    # PyObjC returns (value, error) for selectors with an NSError** out-parameter
+    if isinstance(result, tuple):
+        value, error = result
+        if value is None:
+            raise RuntimeError(f"Metal call failed: {error}")
+        return value
+    return result
+
 
 @dataclass
 class CompiledPattern:
@@ -27,14 +85,139 @@ class CompiledPattern:
     regex: re.Pattern | None
     metal_function: Any | None = None
     is_simple: bool = False
+    pattern_bytes: bytes = b''
+    hs_db: Any | None = None
+    skip_table: np.ndarray | None = None
+    pattern_length: int = field(init=False, default=0)
+    
+    def __post_init__(self) -> None:
+        # Encoded once here rather than on every search
+        if not self.pattern_bytes:
+            self.pattern_bytes = self.pattern.encode('utf-8')
+        self.pattern_length = len(self.pattern_bytes)
+
+
+@dataclass
+class CompiledMultiPattern:
+    patterns: list[str]
+    patterns_bytes: list[bytes]
+    database: Any | None = None
+    automaton: Any | None = None
+    regex: re.Pattern | None = None
+
+
+def _compile_regex(pattern: str) -> re.Pattern:
+    # Process-wide, so throwaway accelerator instances share compiled patterns
+    try:
+        # Bytes patterns let finditer run over the haystack without decoding it
+        return compile_regex(pattern.encode('utf-8'))
+    except re.error:
+        # str-only escapes such as \N{...} need a text pattern
+        return compile_regex(pattern)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _hyperscan_database(patterns_bytes: list[bytes]) -> Any | None:
+    # Literal-only block-mode database; ids are indexes into patterns_bytes
+    try:
+        database: Any = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        database.compile(
+            expressions=[re.escape(pattern) for pattern in patterns_bytes],
+            ids=list(range(len(patterns_bytes))),
+            elements=len(patterns_bytes),
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(patterns_bytes)
+        )
+        return database
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=256)
+def compile_multi_pattern(patterns: tuple[str, ...]) -> CompiledMultiPattern:
+    patterns_bytes: list[bytes] = [pattern.encode('utf-8') for pattern in patterns]
+    compiled: CompiledMultiPattern = CompiledMultiPattern(
+        patterns=list(patterns),
+        patterns_bytes=patterns_bytes
+    )
+    
+    if HYPERSCAN_AVAILABLE:
+        compiled.database = _hyperscan_database(patterns_bytes)
+    
+    if compiled.database is None and AHOCORASICK_AVAILABLE:
+        # latin-1 maps bytes to code points one to one, so str offsets
+        # from the automaton are byte offsets
+        automaton: Any = ahocorasick.Automaton()
+        for index, pattern in enumerate(patterns_bytes):
+            automaton.add_word(pattern.decode('latin-1'), index)
+        automaton.make_automaton()
+        compiled.automaton = automaton
+    
+    if compiled.database is None and compiled.automaton is None:
+        compiled.regex = re.compile(b'|'.join(re.escape(pattern) for pattern in patterns_bytes))
+    
+    return compiled
+
+
+def search_multi(text: bytes | mmap.mmap, pattern: CompiledMultiPattern) -> list[tuple[int, int]]:
+    if pattern.regex is not None:
+        return [match.span() for match in pattern.regex.finditer(text)]
+    
+    # (start, pattern index, end) for every overlapping hit
+    hits: list[tuple[int, int, int]] = []
+    if pattern.database is not None:
+        def on_match(index: int, start: int, end: int, flags: int, context: Any) -> None:
+            hits.append((start, index, end))
+        
+        pattern.database.scan(text, match_event_handler=on_match)
+    else:
+        # The automaton only takes str, so the buffer is decoded a window at
+        # a time rather than copied whole. Windows overlap by the longest
+        # pattern, and each keeps only the hits that start inside it.
+        overlap: int = max(len(pattern_bytes) for pattern_bytes in pattern.patterns_bytes) - 1
+        with memoryview(text) as view:
+            for window in range(0, len(view), _AUTOMATON_WINDOW_BYTES):
+                window_end: int = min(window + _AUTOMATON_WINDOW_BYTES, len(view))
+                chunk: str = codecs.latin_1_decode(view[window:window_end + overlap])[0]
+                for last, index in pattern.automaton.iter(chunk):
+                    length: int = len(pattern.patterns_bytes[index])
+                    start: int = window + last - length + 1
+                    if start < window_end:
+                        hits.append((start, index, start + length))
+    
+    # Match regex alternation semantics: leftmost start, earliest
+    # alternative, no overlaps
+    spans: list[tuple[int, int]] = []
+    covered: int = 0
+    for start, index, end in sorted(hits):
+        if start >= covered:
+            spans.append((start, end))
+            covered = end
+    return spans
+
+
+def _find_iter(text: bytes, pattern_bytes: bytes) -> Iterator[int]:
+    # Overlapping hits, one C-level find per match
+    pos: int = text.find(pattern_bytes)
+    while pos != -1:
+        yield pos
+        pos = text.find(pattern_bytes, pos + 1)
 
 
 class MetalAccelerator:
-    def __init__(self) -> None:
+    def __init__(self, gpu_min_bytes: int = 256 * 1024) -> None:
+        # Below this size a Metal dispatch round-trip costs more than the scan
+        self.gpu_min_bytes: int = gpu_min_bytes
         self.device: Any = None
         self.command_queue: Any = None
         self.library: Any = None
-        self.pattern_cache: dict[str, CompiledPattern] = {}
+        self.pattern_cache: dict[tuple[str, bool], CompiledPattern] = {}
+        self._function_cache: dict[tuple[str, int], Any] = {}
+        self._pipeline_cache: dict[tuple[str, int], Any] = {}
+        self._buffer_pool: dict[int, list[Any]] = {}
         self._initialized: bool = False
         self._metal_available: bool = METAL_AVAILABLE
         
@@ -42,6 +225,23 @@ class MetalAccelerator:
         if multiprocessing.current_process().name == 'MainProcess':
             self._metal_available = False
 
+    @classmethod
+    def get(cls, gpu_min_bytes: int = 256 * 1024) -> MetalAccelerator:
+        # The device, queue, pipelines and pattern cache are worth sharing
+        # across every search engine in the process
+        key: tuple[int, int] = (os.getpid(), gpu_min_bytes)
+        instance: MetalAccelerator | None = _INSTANCES.get(key)
+        if instance is None:
+            instance = cls(gpu_min_bytes)
+            _INSTANCES[key] = instance
+            # Worker processes pay Metal setup here rather than on their first search
+            if multiprocessing.current_process().name != 'MainProcess':
+                instance.warm()
+        return instance
+
+    def warm(self) -> bool:
+        return self._initialize_metal()
+
     def _initialize_metal(self) -> bool:
         """Initialize Metal resources if available and not already initialized"""
         if not self._metal_available or self._initialized:
@@ -54,7 +254,9 @@ class MetalAccelerator:
                 if self.device is None:
                     return False
                 
-                self.command_queue = self.device.newCommandQueue()
+                self.command_queue = self.device.newCommandQueueWithMaxCommandBufferCount_(
+                    self._queue_depth()
+                )
                 self._compile_shaders()
                 self._initialized = True
                 return True
@@ -63,6 +265,12 @@ class MetalAccelerator:
         
         return False
 
+    def _queue_depth(self) -> int:
+        try:
+            return max(1, int(os.environ.get('FLUX_METAL_QUEUE_DEPTH', _DEFAULT_QUEUE_DEPTH)))
+        except ValueError:
+            return _DEFAULT_QUEUE_DEPTH
+
     def _compile_shaders(self) -> None:
         """Compile Metal shader library"""
         if not self.device:
@@ -72,172 +280,398 @@ class MetalAccelerator:
         #include <metal_stdlib>
         using namespace metal;
         
-        kernel void simple_search(device const char* text [[buffer(0)]],
-                                  device const char* pattern [[buffer(1)]],
+        // Each thread scans a tile of TILE_SIZE start positions. A cheap
+        // first/last byte filter rejects most candidates before the full compare.
+        constant uint TILE_SIZE = 16;
+        
+        // Specialised per pattern length so the compare loop has a fixed trip count
+        constant uint pattern_length [[function_constant(0)]];
+        
+        // Matches are written in three passes instead of through one global
+        // atomic: count per tile, scan the per-threadgroup totals, then
+        // write each tile's hits at its prefix offset. Output comes out sorted.
+        
+        inline bool match_at(device const uchar* text, constant uchar* pattern, uint pos) {
+            if (text[pos] != pattern[0] || text[pos + pattern_length - 1] != pattern[pattern_length - 1]) {
+                return false;
+            }
+            for (uint i = 1; i + 1 < pattern_length; i++) {
+                if (text[pos + i] != pattern[i]) {
+                    return false;
+                }
+            }
+            return true;
+        }
+        
+        inline uint tile_end(uint base, uint text_length) {
+            // One past the last start position this tile covers; 0 if none
+            if (pattern_length == 0 || pattern_length > text_length) {
+                return 0;
+            }
+            uint last_start = text_length - pattern_length;
+            if (base > last_start) {
+                return 0;
+            }
+            return min(base + TILE_SIZE - 1, last_start) + 1;
+        }
+        
+        kernel void count_matches(device const uchar* text [[buffer(0)]],
+                                  constant uchar* pattern [[buffer(1)]],
                                   constant uint& text_length [[buffer(2)]],
-                                  constant uint& pattern_length [[buffer(3)]],
-                                  device uint* matches [[buffer(4)]],
-                                  device atomic_uint* match_count [[buffer(5)]],
-                                  uint gid [[thread_position_in_grid]]) {
+                                  device uint* tile_offsets [[buffer(3)]],
+                                  device uint* group_counts [[buffer(4)]],
+                                  uint gid [[thread_position_in_grid]],
+                                  uint group_id [[threadgroup_position_in_grid]],
+                                  uint simd_lane [[thread_index_in_simdgroup]],
+                                  uint simd_id [[simdgroup_index_in_threadgroup]],
+                                  uint simd_count [[simdgroups_per_threadgroup]]) {
+            threadgroup uint simd_offsets[32];
             
-            if (gid >= text_length - pattern_length + 1) {
-                return;
+            uint base = gid * TILE_SIZE;
+            uint end = tile_end(base, text_length);
+            uint count = 0;
+            for (uint pos = base; pos < end; pos++) {
+                count += match_at(text, pattern, pos) ? 1 : 0;
             }
             
-            bool found = true;
-            for (uint i = 0; i < pattern_length; i++) {
-                if (text[gid + i] != pattern[i]) {
-                    found = false;
-                    break;
+            // Threadgroup-local exclusive scan: within each SIMD group, then
+            // across the SIMD group totals
+            uint lane_offset = simd_prefix_exclusive_sum(count);
+            uint simd_total = simd_sum(count);
+            if (simd_lane == 0) {
+                simd_offsets[simd_id] = simd_total;
+            }
+            threadgroup_barrier(mem_flags::mem_threadgroup);
+            
+            if (simd_id == 0) {
+                uint total = simd_lane < simd_count ? simd_offsets[simd_lane] : 0;
+                uint prefix = simd_prefix_exclusive_sum(total);
+                uint group_total = simd_sum(total);
+                if (simd_lane < simd_count) {
+                    simd_offsets[simd_lane] = prefix;
+                }
+                if (simd_lane == 0) {
+                    group_counts[group_id] = group_total;
                 }
             }
+            threadgroup_barrier(mem_flags::mem_threadgroup);
             
-            if (found) {
-                uint idx = atomic_fetch_add_explicit(match_count, 1, memory_order_relaxed);
-                matches[idx] = gid;
+            tile_offsets[gid] = simd_offsets[simd_id] + lane_offset;
+        }
+        
+        // One entry per threadgroup (text_length / 16K for 1024-wide groups),
+        // so a serial in-place exclusive scan is cheap next to the text pass
+        kernel void scan_groups(device uint* group_counts [[buffer(4)]],
+                                constant uint& group_count [[buffer(6)]],
+                                device uint* match_count [[buffer(5)]],
+                                uint gid [[thread_position_in_grid]]) {
+            if (gid != 0) {
+                return;
+            }
+            uint running = 0;
+            for (uint i = 0; i < group_count; i++) {
+                uint count = group_counts[i];
+                group_counts[i] = running;
+                running += count;
+            }
+            match_count[0] = running;
+        }
+        
+        kernel void write_matches(device const uchar* text [[buffer(0)]],
+                                  constant uchar* pattern [[buffer(1)]],
+                                  constant uint& text_length [[buffer(2)]],
+                                  device const uint* tile_offsets [[buffer(3)]],
+                                  device const uint* group_offsets [[buffer(4)]],
+                                  device uint* matches [[buffer(7)]],
+                                  uint gid [[thread_position_in_grid]],
+                                  uint group_id [[threadgroup_position_in_grid]]) {
+            uint base = gid * TILE_SIZE;
+            uint end = tile_end(base, text_length);
+            uint out = group_offsets[group_id] + tile_offsets[gid];
+            for (uint pos = base; pos < end; pos++) {
+                if (match_at(text, pattern, pos)) {
+                    matches[out++] = pos;
+                }
             }
         }
         """
         
         try:
             compile_options: Any = Metal.MTLCompileOptions.new()
-            self.library = self.device.newLibraryWithSource_options_error_(
+            self.library = _objc_result(self.device.newLibraryWithSource_options_error_(
                 shader_source, compile_options, None
-            )
+            ))
         except Exception:
             self.library = None
 
     def compile_pattern(self, pattern: str, is_regex: bool = False) -> CompiledPattern:
-        if pattern in self.pattern_cache:
-            return self.pattern_cache[pattern]
+        # The same text compiles differently as a regex and as a literal
+        key: tuple[str, bool] = (pattern, is_regex)
+        if key in self.pattern_cache:
+            return self.pattern_cache[key]
+        
+        regex: re.Pattern | None = _compile_regex(pattern) if is_regex else None
         
         compiled: CompiledPattern = CompiledPattern(
             pattern=pattern,
-            regex=re.compile(pattern) if is_regex else None,
+            regex=regex,
             is_simple=not is_regex and self._is_simple_pattern(pattern)
         )
+        pattern_bytes: bytes = compiled.pattern_bytes
+        
+        # Hyperscan's all-matches semantics only line up with re for
+        # literals, so regexes stay on the re engine
+        if not is_regex and pattern_bytes and HYPERSCAN_AVAILABLE:
+            compiled.hs_db = _hyperscan_database([pattern_bytes])
+        
+        if not is_regex and NUMBA_AVAILABLE and compiled.pattern_length >= _BMH_MIN_LENGTH:
+            compiled.skip_table = skip_table(pattern_bytes)
         
         # Only try GPU compilation for simple patterns
         if compiled.is_simple and self._initialize_metal():
             try:
-                compiled.metal_function = self.library.newFunctionWithName_("simple_search")
+                compiled.metal_function = self._specialized_function(_COUNT_KERNEL, compiled.pattern_length)
             except Exception:
                 compiled.metal_function = None
         
-        self.pattern_cache[pattern] = compiled
+        self.pattern_cache[key] = compiled
         return compiled
 
+    def _specialized_function(self, name: str, pattern_length: int) -> Any:
+        key: tuple[str, int] = (name, pattern_length)
+        if key in self._function_cache:
+            return self._function_cache[key]
+        
+        constant_values: Any = Metal.MTLFunctionConstantValues.new()
+        constant_values.setConstantValue_type_atIndex_(
+            pattern_length.to_bytes(4, 'little'), Metal.MTLDataTypeUInt, 0
+        )
+        function: Any = _objc_result(self.library.newFunctionWithName_constantValues_error_(
+            name, constant_values, None
+        ))
+        
+        self._function_cache[key] = function
+        return function
+
     def _is_simple_pattern(self, pattern: str) -> bool:
         # Check if pattern is simple enough for GPU acceleration
-        return bool(re.match(r'^[a-zA-Z0-9\s]+$', pattern))
+        return _SIMPLE_RE.match(pattern) is not None
 
-    def search_gpu(self, text: bytes, pattern: CompiledPattern) -> list[int]:
-        # Try GPU acceleration if available
-        if pattern.metal_function and self._initialized:
-            try:
-                return self._search_gpu_metal(text, pattern)
-            except Exception:
-                # Fall back to CPU on any error
-                pass
+    async def search_gpu(self, text: bytes | mmap.mmap, pattern: CompiledPattern,
+                         length: int | None = None) -> np.ndarray:
+        # length marks the end of real data when text is a page-padded buffer
+        text_length: int = len(text) if length is None else length
+        
+        # Single-byte patterns are a memchr, unbeatable on the CPU
+        if text_length >= self.gpu_min_bytes and pattern.pattern_length != 1:
+            # Try GPU acceleration if available
+            if pattern.metal_function and self._initialized:
+                try:
+                    return await self._search_gpu_metal(text, pattern, text_length)
+                except Exception:
+                    # Fall back to CPU on any error
+                    pass
         
+        if text_length != len(text):
+            text = text[:text_length]
         return self._search_cpu(text, pattern)
 
-    def _search_gpu_metal(self, text: bytes, pattern: CompiledPattern) -> list[int]:
-        """Execute GPU search using Metal"""
-        text_length: int = len(text)
-        pattern_bytes: bytes = pattern.pattern.encode()
-        pattern_length: int = len(pattern_bytes)
-        
-        # Allocate buffers
-        text_buffer: Any = self.device.newBufferWithBytes_length_options_(
-            text, text_length, Metal.MTLResourceStorageModeShared
-        )
-        pattern_buffer: Any = self.device.newBufferWithBytes_length_options_(
-            pattern_bytes, pattern_length, Metal.MTLResourceStorageModeShared
-        )
-        
-        # Allocate result buffer (max matches = text length)
-        max_matches: int = text_length
-        matches_buffer: Any = self.device.newBufferWithLength_options_(
-            max_matches * 4, Metal.MTLResourceStorageModeShared
-        )
-        
-        # Match count buffer
-        match_count_buffer: Any = self.device.newBufferWithLength_options_(
-            4, Metal.MTLResourceStorageModeShared
-        )
-        match_count_buffer.contents().as_buffer(4)[0:4] = b'\x00\x00\x00\x00'
-        
-        # Create command buffer and encoder
-        command_buffer: Any = self.command_queue.commandBuffer()
-        compute_encoder: Any = command_buffer.computeCommandEncoder()
-        
-        # Set up pipeline
-        pipeline_state: Any = self.device.newComputePipelineStateWithFunction_error_(
-            pattern.metal_function, None
-        )
-        compute_encoder.setComputePipelineState_(pipeline_state)
-        
-        # Set buffers
-        compute_encoder.setBuffer_offset_atIndex_(text_buffer, 0, 0)
-        compute_encoder.setBuffer_offset_atIndex_(pattern_buffer, 0, 1)
-        compute_encoder.setBytes_length_atIndex_(
-            (text_length).to_bytes(4, 'little'), 4, 2
-        )
-        compute_encoder.setBytes_length_atIndex_(
-            (pattern_length).to_bytes(4, 'little'), 4, 3
-        )
-        compute_encoder.setBuffer_offset_atIndex_(matches_buffer, 0, 4)
-        compute_encoder.setBuffer_offset_atIndex_(match_count_buffer, 0, 5)
+    def _pipeline_state(self, name: str, pattern_length: int) -> Any:
+        # Pipeline creation links the shader; build it once per specialisation
+        key: tuple[str, int] = (name, pattern_length)
+        if key not in self._pipeline_cache:
+            self._pipeline_cache[key] = _objc_result(
+                self.device.newComputePipelineStateWithFunction_error_(
+                    self._specialized_function(name, pattern_length), None
+                )
+            )
+        return self._pipeline_cache[key]
+
+    def _acquire_buffer(self, length: int) -> Any:
+        # Requests round up to a power-of-two size class, so a pooled buffer
+        # is a single dict lookup away
+        size: int = 1 << max(length - 1, 1).bit_length()
+        pooled: list[Any] | None = self._buffer_pool.get(size)
+        if pooled:
+            return pooled.pop()
         
-        # Dispatch threads
-        thread_group_size: int = pipeline_state.maxTotalThreadsPerThreadgroup()
-        thread_groups: int = (text_length + thread_group_size - 1) // thread_group_size
+        return self.device.newBufferWithLength_options_(size, Metal.MTLResourceStorageModeShared)
+
+    def _release_buffers(self, *buffers: Any) -> None:
+        for buffer in buffers:
+            # A couple per size class covers overlapping searches without
+            # pinning unbounded memory
+            pooled: list[Any] = self._buffer_pool.setdefault(buffer.length(), [])
+            if len(pooled) < _BUFFERS_PER_SIZE:
+                pooled.append(buffer)
+
+    async def _search_gpu_metal(self, text: bytes | mmap.mmap, pattern: CompiledPattern,
+                                text_length: int) -> np.ndarray:
+        """Execute GPU search using Metal"""
+        pattern_bytes: bytes = pattern.pattern_bytes
+        pattern_length: int = pattern.pattern_length
+        if pattern_length > _INLINE_BYTES_LIMIT:
+            return self._search_cpu(text, pattern)
+        count_pipeline: Any = self._pipeline_state(_COUNT_KERNEL, pattern_length)
+        scan_pipeline: Any = self._pipeline_state(_SCAN_KERNEL, pattern_length)
+        write_pipeline: Any = self._pipeline_state(_WRITE_KERNEL, pattern_length)
         
-        compute_encoder.dispatchThreadgroups_threadsPerThreadgroup_(
-            Metal.MTLSizeMake(thread_groups, 1, 1),
-            Metal.MTLSizeMake(thread_group_size, 1, 1)
+        # The count and write passes must share a grid shape, since tile
+        # offsets are relative to each threadgroup
+        thread_group_size: int = min(
+            count_pipeline.maxTotalThreadsPerThreadgroup(),
+            write_pipeline.maxTotalThreadsPerThreadgroup()
         )
+        tile_count: int = (text_length + _KERNEL_TILE_SIZE - 1) // _KERNEL_TILE_SIZE
+        thread_groups: int = max((tile_count + thread_group_size - 1) // thread_group_size, 1)
         
-        compute_encoder.endEncoding()
-        command_buffer.commit()
-        command_buffer.waitUntilCompleted()
+        # Page-aligned memory is wrapped in place (unified memory, no copy);
+        # anything else is copied into a pooled shared-storage buffer
+        no_copy: bool = isinstance(text, mmap.mmap) and len(text) % mmap.PAGESIZE == 0
+        text_buffer: Any
+        if no_copy:
+            text_buffer = self.device.newBufferWithBytesNoCopy_length_options_deallocator_(
+                text, len(text), Metal.MTLResourceStorageModeShared, None
+            )
+        else:
+            text_buffer = self._acquire_buffer(text_length)
         
-        # Read results
-        match_count: int = int.from_bytes(
-            match_count_buffer.contents().as_buffer(4)[0:4], 'little'
+        # Pooled scratch and result buffers (max matches = text length)
+        tile_offsets_buffer: Any = self._acquire_buffer(thread_groups * thread_group_size * 4)
+        group_counts_buffer: Any = self._acquire_buffer(thread_groups * 4)
+        matches_buffer: Any = self._acquire_buffer(text_length * 4)
+        match_count_buffer: Any = self._acquire_buffer(4)
+        scratch: tuple[Any, ...] = (
+            tile_offsets_buffer, group_counts_buffer, matches_buffer, match_count_buffer
         )
         
-        matches: list[int] = []
-        if match_count > 0:
-            results: bytes = matches_buffer.contents().as_buffer(match_count * 4)
-            for i in range(match_count):
-                pos: int = int.from_bytes(results[i*4:(i+1)*4], 'little')
-                matches.append(pos)
-        
-        return matches
+        try:
+            if not no_copy:
+                # Copy straight from the caller's memory; slicing text itself
+                # would stage the whole haystack in a temporary bytes first
+                with memoryview(text) as source, source[:text_length] as window:
+                    text_buffer.contents().as_buffer(text_length)[:text_length] = window
+            
+            text_length_bytes: bytes = text_length.to_bytes(4, 'little')
+            grid: Any = Metal.MTLSizeMake(thread_groups, 1, 1)
+            group: Any = Metal.MTLSizeMake(thread_group_size, 1, 1)
+            
+            # All three passes go on one command buffer; Metal orders the
+            # encoders, so no CPU round trip is needed in between
+            command_buffer: Any = self.command_queue.commandBuffer()
+            # Reserve the queue slot now so the driver can prepare while we encode
+            command_buffer.enqueue()
+            
+            count_encoder: Any = command_buffer.computeCommandEncoder()
+            count_encoder.setComputePipelineState_(count_pipeline)
+            count_encoder.setBuffer_offset_atIndex_(text_buffer, 0, 0)
+            count_encoder.setBytes_length_atIndex_(pattern_bytes, pattern_length, 1)
+            count_encoder.setBytes_length_atIndex_(text_length_bytes, 4, 2)
+            count_encoder.setBuffer_offset_atIndex_(tile_offsets_buffer, 0, 3)
+            count_encoder.setBuffer_offset_atIndex_(group_counts_buffer, 0, 4)
+            count_encoder.dispatchThreadgroups_threadsPerThreadgroup_(grid, group)
+            count_encoder.endEncoding()
+            
+            scan_encoder: Any = command_buffer.computeCommandEncoder()
+            scan_encoder.setComputePipelineState_(scan_pipeline)
+            scan_encoder.setBuffer_offset_atIndex_(group_counts_buffer, 0, 4)
+            scan_encoder.setBuffer_offset_atIndex_(match_count_buffer, 0, 5)
+            scan_encoder.setBytes_length_atIndex_(thread_groups.to_bytes(4, 'little'), 4, 6)
+            scan_encoder.dispatchThreadgroups_threadsPerThreadgroup_(
+                Metal.MTLSizeMake(1, 1, 1), Metal.MTLSizeMake(1, 1, 1)
+            )
+            scan_encoder.endEncoding()
+            
+            write_encoder: Any = command_buffer.computeCommandEncoder()
+            write_encoder.setComputePipelineState_(write_pipeline)
+            write_encoder.setBuffer_offset_atIndex_(text_buffer, 0, 0)
+            write_encoder.setBytes_length_atIndex_(pattern_bytes, pattern_length, 1)
+            write_encoder.setBytes_length_atIndex_(text_length_bytes, 4, 2)
+            write_encoder.setBuffer_offset_atIndex_(tile_offsets_buffer, 0, 3)
+            write_encoder.setBuffer_offset_atIndex_(group_counts_buffer, 0, 4)
+            write_encoder.setBuffer_offset_atIndex_(matches_buffer, 0, 7)
+            write_encoder.dispatchThreadgroups_threadsPerThreadgroup_(grid, group)
+            write_encoder.endEncoding()
+            
+            # Completion is signalled from Metal's callback thread; the event
+            # loop keeps serving other requests while the GPU runs
+            loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+            completed: asyncio.Future = loop.create_future()
+            command_buffer.addCompletedHandler_(
+                lambda _: loop.call_soon_threadsafe(_resolve, completed)
+            )
+            command_buffer.commit()
+            
+            try:
+                await asyncio.shield(completed)
+            except asyncio.CancelledError:
+                # The GPU still reads the text and writes the pooled buffers;
+                # hold them until it is done before propagating
+                await completed
+                raise
+            
+            # Read results
+            match_count: int = int.from_bytes(
+                match_count_buffer.contents().as_buffer(4)[0:4], 'little'
+            )
+            
+            if match_count == 0:
+                return np.empty(0, dtype=np.int64)
+            
+            # Offsets were assigned in tile order, so the positions are sorted.
+            # Widening copies them out before the buffer goes back to the pool.
+            results: np.ndarray = np.frombuffer(
+                matches_buffer.contents().as_buffer(match_count * 4), dtype='<u4', count=match_count
+            )
+            return results.astype(np.int64)
+        finally:
+            if no_copy:
+                self._release_buffers(*scratch)
+            else:
+                self._release_buffers(text_buffer, *scratch)
 
-    def _search_cpu(self, text: bytes, pattern: CompiledPattern) -> list[int]:
+    def _search_cpu(self, text: bytes, pattern: CompiledPattern) -> np.ndarray:
         if pattern.regex:
-            text_str: str = text.decode('utf-8', errors='ignore')
-            return [m.start() for m in pattern.regex.finditer(text_str)]
-        else:
-            pattern_bytes: bytes = pattern.pattern.encode()
+            if isinstance(pattern.regex.pattern, bytes):
+                return np.fromiter(
+                    (m.start() for m in pattern.regex.finditer(text)), dtype=np.int64
+                )
+            # Only str-only patterns get here. surrogateescape keeps one char
+            # per undecodable byte, so offsets can be mapped back to bytes.
+            text_str: str = str(text, 'utf-8', 'surrogateescape')
+            positions: list[int] = []
+            byte_offset: int = 0
+            char_offset: int = 0
+            for m in pattern.regex.finditer(text_str):
+                byte_offset += len(text_str[char_offset:m.start()].encode('utf-8', 'surrogateescape'))
+                char_offset = m.start()
+                positions.append(byte_offset)
+            return np.array(positions, dtype=np.int64)
+        elif pattern.hs_db is not None:
+            # Every overlapping hit is reported from C, one callback each
             matches: list[int] = []
-            start: int = 0
             
-            while True:
-                pos: int = text.find(pattern_bytes, start)
-                if pos == -1:
-                    break
-                matches.append(pos)
-                start = pos + 1
+            def on_match(index: int, start: int, end: int, flags: int, context: Any) -> None:
+                matches.append(start)
             
-            return matches
+            pattern.hs_db.scan(
+                text if isinstance(text, bytes) else bytes(text), match_event_handler=on_match
+            )
+            return np.array(matches, dtype=np.int64)
+        elif pattern.skip_table is not None:
+            # JIT-compiled Horspool over a zero-copy view; no per-match re-entry
+            return bmh_all(
+                np.frombuffer(text, dtype=np.uint8),
+                np.frombuffer(pattern.pattern_bytes, dtype=np.uint8),
+                pattern.skip_table
+            )
+        else:
+            return np.fromiter(_find_iter(text, pattern.pattern_bytes), dtype=np.int64)
 
     def cleanup(self) -> None:
-        # Metal cleanup if needed
-        pass
+        # Drop pooled buffers and cached pipelines so Metal can reclaim them
+        self._buffer_pool.clear()
+        self._pipeline_cache.clear()
 
     def __del__(self) -> None:
         self.cleanup()
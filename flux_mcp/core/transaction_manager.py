@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import os
+import atexit
 import asyncio
 import uuid
+import platform
+import subprocess
 from pathlib import Path
 from typing import Any
 from dataclasses import dataclass, field
@@ -9,24 +13,72 @@ from datetime import datetime
 import fcntl
 import tempfile
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
 
-@dataclass
+# Files above this size are snapshotted to a sibling file instead of memory
+_SNAPSHOT_THRESHOLD: int = 1024 * 1024
+# Linux ioctl that shares extents copy-on-write (btrfs, XFS)
+_FICLONE: int = 0x40049409
+# macOS write barrier; older Pythons don't export the constant
+_F_BARRIERFSYNC: int | None = getattr(
+    fcntl, 'F_BARRIERFSYNC', 85 if platform.system() == "Darwin" else None
+)
+# Linux-only: an unnamed file in a directory, given a name with linkat(2)
+_O_TMPFILE: int | None = getattr(os, 'O_TMPFILE', None)
+
+_DEFAULT_IO_THREADS: int = 16
+
+
+def _io_threads() -> int:
+    try:
+        return max(1, int(os.environ.get('FLUX_IO_THREADS', _DEFAULT_IO_THREADS)))
+    except ValueError:
+        return _DEFAULT_IO_THREADS
+
+
+# Transaction file I/O gets its own pool so it never queues behind unrelated
+# work on the loop's default executor
+_IO_EXECUTOR: ThreadPoolExecutor = ThreadPoolExecutor(
+    max_workers=_io_threads(), thread_name_prefix="flux-io"
+)
+atexit.register(_IO_EXECUTOR.shutdown, wait=False)
+
+
+@dataclass(slots=True, kw_only=True)
+class _FileEntry:
+    path: Path
+    fd: int
+    handle: Any
+    # Rollback source: small files keep their bytes, large ones a snapshot
+    original_state: bytes | None = None
+    original_snapshot: Path | None = None
+    temp_fd: int = -1
+    # Only set for named temp files; O_TMPFILE ones get a name at commit
+    temp_path: Path | None = None
+
+
+@dataclass(slots=True, kw_only=True)
 class Transaction:
     id: str
     timestamp: datetime
-    file_locks: dict[Path, int] = field(default_factory=dict)
-    file_handles: dict[Path, Any] = field(default_factory=dict)
-    original_states: dict[Path, bytes] = field(default_factory=dict)
-    temp_files: dict[Path, Path] = field(default_factory=dict)
+    # Everything held for one file sits in one record, walked in lock order
+    entries: list[_FileEntry] = field(default_factory=list)
+    by_path: dict[Path, _FileEntry] = field(default_factory=dict)
     is_committed: bool = False
     is_rolled_back: bool = False
 
 
 class TransactionManager:
-    def __init__(self) -> None:
+    def __init__(self, full_fsync: bool = False) -> None:
         self.transactions: dict[str, Transaction] = {}
+        # Guards only the transactions dict; I/O runs under the per-transaction
+        # lock, and acquisition of a file under that file's lock
         self.lock: asyncio.Lock = asyncio.Lock()
+        self.tx_locks: dict[str, asyncio.Lock] = {}
+        self.path_locks: dict[Path, asyncio.Lock] = {}
+        # Durability-critical callers can ask for a full device flush per write
+        self.full_fsync: bool = full_fsync
 
     async def begin(self) -> str:
         async with self.lock:
@@ -36,14 +88,16 @@ class TransactionManager:
                 timestamp=datetime.now()
             )
             self.transactions[transaction_id] = transaction
+            self.tx_locks[transaction_id] = asyncio.Lock()
             return transaction_id
 
     async def acquire_file_lock(self, transaction_id: str, file_path: Path) -> None:
-        async with self.lock:
-            transaction: Transaction = self.transactions.get(transaction_id)
-            if not transaction:
-                raise ValueError(f"Invalid transaction ID: {transaction_id}")
-            
+        transaction: Transaction = self.transactions.get(transaction_id)
+        if not transaction:
+            raise ValueError(f"Invalid transaction ID: {transaction_id}")
+        
+        path_lock: asyncio.Lock = self.path_locks.setdefault(file_path, asyncio.Lock())
+        async with self.tx_locks[transaction_id], path_lock:
             if transaction.is_committed or transaction.is_rolled_back:
                 raise ValueError("Transaction already finished")
             
@@ -52,121 +106,324 @@ class TransactionManager:
             fd: int
             file_handle: Any
             fd, file_handle = await loop.run_in_executor(
-                None, self._acquire_lock_sync, file_path
+                _IO_EXECUTOR, self._acquire_lock_sync, file_path
             )
             
-            transaction.file_locks[file_path] = fd
-            transaction.file_handles[file_path] = file_handle
+            entry: _FileEntry = _FileEntry(path=file_path, fd=fd, handle=file_handle)
+            transaction.entries.append(entry)
+            transaction.by_path[file_path] = entry
             
-            # Read current state for rollback capability if file exists
-            if file_path.exists():
-                with open(file_path, 'rb') as f:
-                    transaction.original_states[file_path] = f.read()
+            # Keep the current state for rollback; large files get a
+            # sibling snapshot rather than a copy in memory
+            size: int = os.fstat(fd).st_size
+            if size > _SNAPSHOT_THRESHOLD:
+                entry.original_snapshot = await loop.run_in_executor(
+                    _IO_EXECUTOR, self._snapshot_sync, file_path
+                )
             else:
-                transaction.original_states[file_path] = b''
+                entry.original_state = await loop.run_in_executor(
+                    _IO_EXECUTOR, self._read_state_sync, fd, size
+                )
             
             # Create temp file for atomic operations
-            temp_fd: int
-            temp_path: str
-            temp_fd, temp_path = tempfile.mkstemp(
-                dir=file_path.parent,
-                prefix=f".{file_path.name}.",
-                suffix=".tmp"
-            )
-            transaction.temp_files[file_path] = Path(temp_path)
+            entry.temp_fd, entry.temp_path = self._create_temp_sync(file_path)
+
+    def _create_temp_sync(self, file_path: Path) -> tuple[int, Path | None]:
+        # An O_TMPFILE inode has no directory entry until commit links it in,
+        # so a crash can't strand it; not every filesystem supports one
+        if _O_TMPFILE is not None:
+            try:
+                return os.open(file_path.parent, _O_TMPFILE | os.O_RDWR, 0o600), None
+            except OSError:
+                pass
+        
+        temp_fd: int
+        temp_name: str
+        temp_fd, temp_name = tempfile.mkstemp(
+            dir=file_path.parent,
+            prefix=f".{file_path.name}.",
+            suffix=".tmp"
+        )
+        return temp_fd, Path(temp_name)
 
     def _acquire_lock_sync(self, file_path: Path) -> tuple[int, Any]:
-        # Create parent directories if they don't exist
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        # Open for reading and writing, creating the file if it doesn't exist;
+        # parent directories are only created when the open says they're missing
+        try:
+            fd: int = os.open(file_path, os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(file_path, os.O_RDWR | os.O_CREAT, 0o644)
         
-        # Create file if it doesn't exist
-        if not file_path.exists():
-            file_path.touch()
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BaseException:
+            os.close(fd)
+            raise
         
-        # Open file for reading and writing
-        file_handle = open(file_path, 'r+b')
-        fd: int = file_handle.fileno()
-        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # Only held to keep the descriptor alive; no buffer needed
+        file_handle: Any = os.fdopen(fd, 'r+b', buffering=0)
         return fd, file_handle
 
-    async def write_to_temp(self, transaction_id: str, file_path: Path, content: bytes) -> None:
-        async with self.lock:
-            transaction: Transaction = self.transactions.get(transaction_id)
-            if not transaction:
-                raise ValueError(f"Invalid transaction ID: {transaction_id}")
+    def _read_state_sync(self, fd: int, size: int) -> bytes:
+        # One pread on the already-locked descriptor straight into the
+        # result; no second open or buffered reader
+        state: bytes = os.pread(fd, size, 0)
+        while len(state) < size:
+            chunk: bytes = os.pread(fd, size - len(state), len(state))
+            if not chunk:
+                break
+            state += chunk
+        return state
+
+    def _snapshot_sync(self, file_path: Path) -> Path:
+        snapshot_fd: int
+        snapshot_name: str
+        snapshot_fd, snapshot_name = tempfile.mkstemp(
+            dir=file_path.parent,
+            prefix=f".{file_path.name}.",
+            suffix=".orig"
+        )
+        snapshot_path: Path = Path(snapshot_name)
+        
+        try:
+            if platform.system() == "Darwin":
+                os.close(snapshot_fd)
+                snapshot_fd = -1
+                try:
+                    # clonefile(2) on APFS: metadata only, blocks shared copy-on-write
+                    subprocess.run(
+                        ['cp', '-c', str(file_path), snapshot_name],
+                        check=True, capture_output=True
+                    )
+                except (OSError, subprocess.CalledProcessError):
+                    shutil.copyfile(file_path, snapshot_path)
+            else:
+                with open(file_path, 'rb') as source:
+                    self._clone_sync(source.fileno(), snapshot_fd)
             
-            temp_path: Path = transaction.temp_files.get(file_path)
-            if not temp_path:
+            # The snapshot replaces the original on rollback, so it needs its mode
+            shutil.copymode(file_path, snapshot_path)
+        except BaseException:
+            snapshot_path.unlink(missing_ok=True)
+            raise
+        finally:
+            if snapshot_fd != -1:
+                os.close(snapshot_fd)
+        
+        return snapshot_path
+
+    def _clone_sync(self, source_fd: int, snapshot_fd: int) -> None:
+        try:
+            fcntl.ioctl(snapshot_fd, _FICLONE, source_fd)
+            return
+        except OSError:
+            pass
+        
+        size: int = os.fstat(source_fd).st_size
+        offset: int = 0
+        try:
+            while offset < size:
+                copied: int = os.copy_file_range(source_fd, snapshot_fd, size - offset, offset, offset)
+                if not copied:
+                    break
+                offset += copied
+        except (AttributeError, OSError):
+            # No in-kernel copy on this platform or filesystem pair
+            while offset < size:
+                chunk: bytes = os.pread(source_fd, min(size - offset, 1024 * 1024), offset)
+                if not chunk:
+                    break
+                offset += os.pwrite(snapshot_fd, chunk, offset)
+
+    def _discard_snapshots(self, transaction: Transaction) -> None:
+        for entry in transaction.entries:
+            if entry.original_snapshot is not None:
+                entry.original_snapshot.unlink(missing_ok=True)
+                entry.original_snapshot = None
+
+    async def write_to_temp(self, transaction_id: str, file_path: Path, content: bytes) -> None:
+        transaction: Transaction = self.transactions.get(transaction_id)
+        if not transaction:
+            raise ValueError(f"Invalid transaction ID: {transaction_id}")
+        
+        async with self.tx_locks[transaction_id]:
+            entry: _FileEntry | None = transaction.by_path.get(file_path)
+            if entry is None or entry.temp_fd == -1:
                 raise ValueError(f"No lock acquired for file: {file_path}")
             
             loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
             await loop.run_in_executor(
-                None, self._write_temp_sync, temp_path, content
+                _IO_EXECUTOR, self._write_temp_sync, entry.temp_fd, content
             )
 
-    def _write_temp_sync(self, temp_path: Path, content: bytes) -> None:
-        with open(temp_path, 'wb') as f:
-            f.write(content)
-            f.flush()
-            import os
-            os.fsync(f.fileno())
+    def _write_temp_sync(self, temp_fd: int, content: bytes) -> None:
+        # Durability is normally settled once for all files at commit
+        os.ftruncate(temp_fd, 0)
+        with memoryview(content) as view:
+            written: int = 0
+            while written < len(view):
+                written += os.pwrite(temp_fd, view[written:], written)
+        
+        if self.full_fsync:
+            self._full_fsync(temp_fd)
+
+    def _full_fsync(self, fd: int) -> None:
+        # F_FULLFSYNC also drains the drive's cache on macOS; fsync does not
+        if hasattr(fcntl, 'F_FULLFSYNC'):
+            try:
+                fcntl.fcntl(fd, fcntl.F_FULLFSYNC)
+                return
+            except OSError:
+                pass
+        os.fsync(fd)
+
+    def _sync_temp_files_sync(self, temp_fds: list[int]) -> None:
+        # Temp contents must be durable before the renames publish them
+        if self.full_fsync:
+            return
+        
+        for fd in temp_fds:
+            if _F_BARRIERFSYNC is not None:
+                # Flushes this file's data, then orders it ahead of later
+                # writes such as the renames. It says nothing about other
+                # files' dirty pages, so every temp file gets its own.
+                try:
+                    fcntl.fcntl(fd, _F_BARRIERFSYNC)
+                    continue
+                except OSError:
+                    pass
+            os.fsync(fd)
+
+    def _link_temp_sync(self, temp_fd: int, file_path: Path) -> Path:
+        # linkat(2) can't replace an existing name, so the unnamed file gets
+        # a private sibling name and the usual rename publishes it atomically
+        temp_name: str = f".{file_path.name}.{uuid.uuid4().hex}.tmp"
+        # Passing a dir fd makes os.link use linkat with AT_SYMLINK_FOLLOW;
+        # plain link(2) would try to link the /proc symlink itself
+        dir_fd: int = os.open(file_path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.link(f"/proc/self/fd/{temp_fd}", temp_name,
+                    dst_dir_fd=dir_fd, follow_symlinks=True)
+        finally:
+            os.close(dir_fd)
+        return file_path.parent / temp_name
 
     async def commit(self, transaction_id: str) -> None:
-        async with self.lock:
-            transaction: Transaction = self.transactions.get(transaction_id)
-            if not transaction:
-                raise ValueError(f"Invalid transaction ID: {transaction_id}")
-            
+        transaction: Transaction = self.transactions.get(transaction_id)
+        if not transaction:
+            raise ValueError(f"Invalid transaction ID: {transaction_id}")
+        
+        async with self.tx_locks[transaction_id]:
             if transaction.is_committed or transaction.is_rolled_back:
                 raise ValueError("Transaction already finished")
             
             try:
+                entries: list[_FileEntry] = [
+                    entry for entry in transaction.entries if entry.temp_fd != -1
+                ]
+                loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+                await loop.run_in_executor(
+                    _IO_EXECUTOR, self._sync_temp_files_sync, [entry.temp_fd for entry in entries]
+                )
+                
                 # Atomic rename of all temp files
-                for original_path, temp_path in transaction.temp_files.items():
-                    shutil.move(str(temp_path), str(original_path))
+                for entry in entries:
+                    if entry.temp_path is None:
+                        entry.temp_path = self._link_temp_sync(entry.temp_fd, entry.path)
+                    shutil.move(str(entry.temp_path), str(entry.path))
+                    entry.temp_path = None
                 
                 transaction.is_committed = True
+                self._discard_snapshots(transaction)
             finally:
                 self._release_all_locks(transaction)
+            
+            # A failed commit stays registered, snapshots and all, so the
+            # caller can still roll it back
+            self._forget(transaction)
 
     async def rollback(self, transaction_id: str) -> None:
-        async with self.lock:
-            transaction: Transaction = self.transactions.get(transaction_id)
-            if not transaction:
-                raise ValueError(f"Invalid transaction ID: {transaction_id}")
-            
+        transaction: Transaction = self.transactions.get(transaction_id)
+        if not transaction:
+            raise ValueError(f"Invalid transaction ID: {transaction_id}")
+        
+        async with self.tx_locks[transaction_id]:
             if transaction.is_committed or transaction.is_rolled_back:
                 raise ValueError("Transaction already finished")
             
             try:
-                # Restore original states
-                for file_path, original_state in transaction.original_states.items():
-                    if original_state:  # Only restore if there was original content
-                        with open(file_path, 'wb') as f:
-                            f.write(original_state)
-                    elif file_path.exists():
+                for entry in transaction.entries:
+                    # Snapshots are restored with a rename, not a rewrite
+                    if entry.original_snapshot is not None:
+                        os.replace(entry.original_snapshot, entry.path)
+                        entry.original_snapshot = None
+                    elif entry.original_state:  # Only restore if there was original content
+                        with open(entry.path, 'wb') as f:
+                            f.write(entry.original_state)
+                    elif entry.original_state is not None and entry.path.exists():
                         # If file was new and transaction is rolling back, remove it
-                        file_path.unlink()
-                
-                # Clean up temp files
-                for temp_path in transaction.temp_files.values():
-                    if temp_path.exists():
-                        temp_path.unlink()
+                        entry.path.unlink()
+                    
+                    # Named temp files need removing; unnamed ones go with their fd
+                    if entry.temp_path is not None:
+                        entry.temp_path.unlink(missing_ok=True)
+                        entry.temp_path = None
                 
                 transaction.is_rolled_back = True
             finally:
                 self._release_all_locks(transaction)
+            
+            self._forget(transaction)
+
+    async def aclose(self) -> None:
+        # Abandon unfinished transactions: nothing has touched the original
+        # files yet, so dropping temp files and locks is enough
+        async with self.lock:
+            transactions: list[Transaction] = list(self.transactions.values())
+        
+        for transaction in transactions:
+            async with self.tx_locks[transaction.id]:
+                if transaction.is_committed or transaction.is_rolled_back:
+                    continue
+                
+                for entry in transaction.entries:
+                    if entry.temp_path is not None:
+                        entry.temp_path.unlink(missing_ok=True)
+                        entry.temp_path = None
+                self._discard_snapshots(transaction)
+                
+                transaction.is_rolled_back = True
+                self._release_all_locks(transaction)
+                self._forget(transaction)
+
+    def _forget(self, transaction: Transaction) -> None:
+        # Finished transactions are dropped so the table only holds live ones;
+        # callers still waiting on the lock see the finished flags instead
+        self.transactions.pop(transaction.id, None)
+        self.tx_locks.pop(transaction.id, None)
 
     def _release_all_locks(self, transaction: Transaction) -> None:
-        for file_path, fd in transaction.file_locks.items():
+        for entry in transaction.entries:
             try:
-                fcntl.flock(fd, fcntl.LOCK_UN)
+                fcntl.flock(entry.fd, fcntl.LOCK_UN)
             except Exception:
                 pass
-        
-        # Close file handles
-        for file_handle in transaction.file_handles.values():
+            
+            # Drop idle path locks so the table tracks live files only
+            path_lock: asyncio.Lock | None = self.path_locks.get(entry.path)
+            if path_lock is not None and not path_lock.locked():
+                del self.path_locks[entry.path]
+            
+            # Close file handles
             try:
-                file_handle.close()
+                entry.handle.close()
             except Exception:
                 pass
+            
+            if entry.temp_fd != -1:
+                try:
+                    os.close(entry.temp_fd)
+                except OSError:
+                    pass
+                entry.temp_fd = -1
@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True, kw_only=True)
 class FileState:
     path: Path
     size: int
@@ -18,7 +18,7 @@ class FileState:
     lock_holder: str | None = None
     
 
-@dataclass
+@dataclass(slots=True, kw_only=True)
 class FileSnapshot:
     file_state: FileState
     content: bytes
@@ -26,7 +26,7 @@ class FileSnapshot:
     transaction_id: str | None = None
     
 
-@dataclass 
+@dataclass(slots=True, kw_only=True)
 class FileMetadata:
     path: Path
     size: int
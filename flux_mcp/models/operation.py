@@ -6,7 +6,7 @@ from datetime import datetime
 from pathlib import Path
 
 
-@dataclass
+@dataclass(slots=True, kw_only=True)
 class Operation:
     id: str
     type: str
@@ -18,7 +18,7 @@ class Operation:
     duration_ms: float | None = None
 
 
-@dataclass
+@dataclass(slots=True, kw_only=True)
 class ReadOperation(Operation):
     file_path: Path
     encoding: str | None
@@ -27,7 +27,7 @@ class ReadOperation(Operation):
     bytes_read: int | None = None
 
 
-@dataclass
+@dataclass(slots=True, kw_only=True)
 class WriteOperation(Operation):
     file_path: Path
     content: str
@@ -36,7 +36,7 @@ class WriteOperation(Operation):
     bytes_written: int | None = None
 
 
-@dataclass
+@dataclass(slots=True, kw_only=True)
 class SearchOperation(Operation):
     file_path: Path
     pattern: str
@@ -46,7 +46,7 @@ class SearchOperation(Operation):
     matches_found: int | None = None
 
 
-@dataclass
+@dataclass(slots=True, kw_only=True)
 class ReplaceOperation(Operation):
     file_path: Path
     old_text: str
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import numpy as np
+
+# Numba is optional; without it distances come from a rolling-row loop over
+# the strings themselves
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _distance_rows(a: np.ndarray, b: np.ndarray, max_distance: int) -> int:
+    # Two rolling rows of the edit-distance table; b is the shorter input,
+    # so memory is O(min(n, m)). A row's minimum never decreases further
+    # down, so once it passes max_distance the answer is just "too far".
+    length_b = b.shape[0]
+    prev = np.arange(length_b + 1, dtype=np.int32)
+    curr = np.empty(length_b + 1, dtype=np.int32)
+
+    for i in range(1, a.shape[0] + 1):
+        curr[0] = i
+        row_min = i
+        char = a[i - 1]
+        for j in range(1, length_b + 1):
+            cost = 0 if char == b[j - 1] else 1
+            best = prev[j] + 1
+            if curr[j - 1] + 1 < best:
+                best = curr[j - 1] + 1
+            if prev[j - 1] + cost < best:
+                best = prev[j - 1] + cost
+            curr[j] = best
+            if best < row_min:
+                row_min = best
+        if row_min > max_distance:
+            return max_distance + 1
+        prev, curr = curr, prev
+
+    return min(prev[length_b], max_distance + 1)
+
+
+if NUMBA_AVAILABLE:
+    _distance_rows_jit = njit(cache=True, boundscheck=False)(_distance_rows)
+
+
+def _codepoints(text: str) -> np.ndarray:
+    # One element per character, so distances count characters, not bytes
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+
+def levenshtein(str1: str, str2: str, max_distance: int | None = None) -> int:
+    # Distances beyond max_distance come back as max_distance + 1
+    if len(str1) < len(str2):
+        str1, str2 = str2, str1
+    if max_distance is None:
+        max_distance = len(str1)
+
+    if NUMBA_AVAILABLE:
+        return int(_distance_rows_jit(_codepoints(str1), _codepoints(str2), max_distance))
+
+    prev: list[int] = list(range(len(str2) + 1))
+    for i, char in enumerate(str1, 1):
+        curr: list[int] = [i]
+        for j, other in enumerate(str2, 1):
+            curr.append(min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + (char != other)))
+        if min(curr) > max_distance:
+            return max_distance + 1
+        prev = curr
+
+    return min(prev[-1], max_distance + 1)
@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import os
+import mmap
+import errno
+import shutil
 import asyncio
 from pathlib import Path
-from typing import Any
-import chardet
-import aiofiles
+import numpy as np
 from dataclasses import dataclass
 
 from flux_mcp.core.transaction_manager import TransactionManager
 from flux_mcp.core.memory_manager import MemoryManager
 from flux_mcp.models.file_state import FileState, FileMetadata
 from flux_mcp.utils.file_lock import FileLock
+from flux_mcp.utils.encoding_detector import detect_sample_encoding
+
+# copy_file_range errors that mean "not here", not "failed"
+_COPY_RANGE_UNSUPPORTED: frozenset[int] = frozenset(
+    (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM)
+)
 
 
 class FileHandler:
@@ -30,47 +38,69 @@ class FileHandler:
         #     return cached_content.decode(encoding or 'utf-8')
         
         # Read file
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}") from None
         
         content: bytes
         
         if start_line is not None or end_line is not None:
             content = await self._read_lines(file_path, start_line, end_line)
         else:
-            async with aiofiles.open(file_path, 'rb') as f:
-                content = await f.read()
+            # One executor hop for the whole read; aiofiles would take one
+            # each for open, read and close
+            loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+            content = await loop.run_in_executor(None, self._read_all_sync, file_path)
         
-        # Detect encoding if not specified
+        # Detect encoding if not specified; only a sample from the start of
+        # the file is representative enough to remember
         if encoding is None:
-            detected: dict[str, Any] = chardet.detect(content[:1024])
-            encoding = detected['encoding'] or 'utf-8'
+            cache_key: tuple[Path, int, int] = (file_path, stat.st_mtime_ns, stat.st_size)
+            encoding = self.memory_manager.encoding_cache_get(cache_key)
+            if encoding is None:
+                encoding = detect_sample_encoding(content[:1024])
+                if start_line is None and end_line is None:
+                    self.memory_manager.encoding_cache_put(cache_key, encoding)
         
         # Skip caching for now
-        # await self.memory_manager.cache_put(cache_key, content)
+        # await self.memory_manager.cache_put(cache_key, content, file_path)
         
-        return content.decode(encoding)
+        text: str = content.decode(encoding)
+        if start_line is None and end_line is None:
+            self.memory_manager.decoded_put(file_path, text, encoding, content)
+        return text
 
     async def _read_lines(self, file_path: Path, start_line: int | None, 
                          end_line: int | None) -> bytes:
-        lines: list[bytes] = []
-        current_line: int = 0
-        
-        async with aiofiles.open(file_path, 'rb') as f:
-            async for line in f:
-                if start_line is not None and current_line < start_line:
-                    current_line += 1
-                    continue
-                
-                if end_line is not None and current_line > end_line:
-                    break
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, self._read_lines_sync, file_path, start_line, end_line
+        )
+
+    def _read_lines_sync(self, file_path: Path, start_line: int | None,
+                         end_line: int | None) -> bytes:
+        # Line starts come from one vectorised newline scan of a mapping,
+        # and the wanted range is sliced out in a single copy
+        start: int = max(start_line or 0, 0)
+        if end_line is not None and end_line < start:
+            return b''
+        
+        with open(file_path, 'rb', buffering=0) as f:
+            size: int = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return b''
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                line_offsets: np.ndarray = self.memory_manager.line_offsets(mm, size)
+                if start >= len(line_offsets):
+                    return b''
                 
-                if start_line is None or current_line >= start_line:
-                    lines.append(line)
+                end: int = size
+                if end_line is not None and end_line + 1 < len(line_offsets):
+                    end = int(line_offsets[end_line + 1])
                 
-                current_line += 1
-        
-        return b''.join(lines)
+                return mm[int(line_offsets[start]):end]
 
     async def write_file(self, file_path: Path, content: str, 
                         encoding: str = 'utf-8', backup: bool = True) -> None:
@@ -107,8 +137,13 @@ class FileHandler:
                 backup_path: Path = file_path.with_suffix(file_path.suffix + '.bak')
                 shutil.copy2(file_path, backup_path)
             
-            # Write to temp file
-            content_bytes: bytes = content.encode(encoding)
+            # Write to temp file; text handed back unchanged from read_file
+            # reuses the bytes it was decoded from
+            content_bytes: bytes | None = self.memory_manager.encoded_get(
+                file_path, content, encoding
+            )
+            if content_bytes is None:
+                content_bytes = content.encode(encoding)
             await self.transaction_manager.write_to_temp(
                 transaction_id, file_path, content_bytes
             )
@@ -137,35 +172,35 @@ class FileHandler:
 
     async def _clear_file_cache(self, file_path: Path) -> None:
         # Clear all cache entries for this file
-        cache_keys: list[str] = []
-        async with self.memory_manager.lock:
-            for key in self.memory_manager.cache.keys():
-                if key.startswith(str(file_path)):
-                    cache_keys.append(key)
-        
-        for key in cache_keys:
-            self.memory_manager.cache.pop(key, None)
+        self.memory_manager.cache_invalidate_path(file_path)
 
     async def get_file_metadata(self, file_path: Path) -> FileMetadata:
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}") from None
         
-        stat = file_path.stat()
+        # One read serves the binary, encoding and line-ending checks; it
+        # runs in the executor so a slow disk can't stall the event loop
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        sample: bytes | None = await loop.run_in_executor(
+            None, self._sample_file, file_path, 8192
+        )
         
         # Detect if binary
-        is_binary: bool = await self._is_binary_file(file_path)
+        is_binary: bool = sample is None or self._is_binary_file(sample[:1024])
         
         # Detect encoding for text files
         detected_encoding: str | None = None
         if not is_binary:
-            sample: bytes
-            async with aiofiles.open(file_path, 'rb') as f:
-                sample = await f.read(1024)
-            detected: dict[str, Any] = chardet.detect(sample)
-            detected_encoding = detected['encoding']
+            cache_key: tuple[Path, int, int] = (file_path, stat.st_mtime_ns, stat.st_size)
+            detected_encoding = self.memory_manager.encoding_cache_get(cache_key)
+            if detected_encoding is None:
+                detected_encoding = detect_sample_encoding(sample[:1024])
+                self.memory_manager.encoding_cache_put(cache_key, detected_encoding)
         
         # Detect line endings
-        line_endings: str = await self._detect_line_endings(file_path)
+        line_endings: str = 'Unknown' if sample is None else self._detect_line_endings(sample)
         
         return FileMetadata(
             path=file_path,
@@ -180,52 +215,67 @@ class FileHandler:
             line_endings=line_endings
         )
 
-    async def _is_binary_file(self, file_path: Path) -> bool:
-        try:
-            sample: bytes
-            async with aiofiles.open(file_path, 'rb') as f:
-                sample = await f.read(1024)
-            
-            # Check for null bytes
-            return b'\x00' in sample
-        except Exception:
-            return True
+    def _read_all_sync(self, file_path: Path) -> bytes:
+        # FileIO.readall sizes its buffer from fstat, so a regular file
+        # comes back in a single read
+        with open(file_path, 'rb', buffering=0) as f:
+            return f.readall()
 
-    async def _detect_line_endings(self, file_path: Path) -> str:
+    def _copy_file_sync(self, source: Path, destination: Path) -> None:
+        # copy_file_range lets filesystems such as XFS and Btrfs share extents
+        # instead of copying them. Where the kernel or filesystem pair can't
+        # do it, copyfile falls back to sendfile on Linux, fcopyfile on macOS.
+        if hasattr(os, 'copy_file_range'):
+            with open(source, 'rb', buffering=0) as src, open(destination, 'wb', buffering=0) as dst:
+                size: int = os.fstat(src.fileno()).st_size
+                copied: int = 0
+                try:
+                    while True:
+                        count: int = os.copy_file_range(
+                            src.fileno(), dst.fileno(), min(size - copied, 1 << 30)
+                        )
+                        if not count:
+                            return
+                        copied += count
+                except OSError as e:
+                    if copied or e.errno not in _COPY_RANGE_UNSUPPORTED:
+                        raise
+        
+        shutil.copyfile(source, destination)
+
+    def _sample_file(self, file_path: Path, size: int) -> bytes | None:
+        # One unbuffered read of a few KiB, no aiofiles open/read/close hops
         try:
-            sample: bytes
-            async with aiofiles.open(file_path, 'rb') as f:
-                sample = await f.read(8192)
-            
-            if b'\r\n' in sample:
-                return 'CRLF'
-            elif b'\r' in sample:
-                return 'CR'
-            elif b'\n' in sample:
-                return 'LF'
-            else:
-                return 'None'
+            with open(file_path, 'rb', buffering=0) as f:
+                return f.read(size)
         except Exception:
-            return 'Unknown'
+            return None
+
+    def _is_binary_file(self, sample: bytes) -> bool:
+        # Check for null bytes
+        return b'\x00' in sample
+
+    def _detect_line_endings(self, sample: bytes) -> str:
+        # Each membership test is a memchr-backed scan in C. Without a CR
+        # only LF is left to look for, so most files take two scans.
+        if b'\r' not in sample:
+            return 'LF' if b'\n' in sample else 'None'
+        return 'CRLF' if b'\r\n' in sample else 'CR'
 
     async def copy_file(self, source: Path, destination: Path) -> None:
-        if not source.exists():
-            raise FileNotFoundError(f"Source file not found: {source}")
+        try:
+            source_stat = source.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Source file not found: {source}") from None
         
         # Create destination directory if needed
         destination.parent.mkdir(parents=True, exist_ok=True)
         
-        # Copy file
-        async with aiofiles.open(source, 'rb') as src:
-            async with aiofiles.open(destination, 'wb') as dst:
-                while True:
-                    chunk: bytes = await src.read(self.memory_manager.config.chunk_size)
-                    if not chunk:
-                        break
-                    await dst.write(chunk)
+        # Copy file in the kernel rather than through Python chunks
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._copy_file_sync, source, destination)
         
         # Copy metadata
-        source_stat = source.stat()
         destination.chmod(source_stat.st_mode)
 
     async def move_file(self, source: Path, destination: Path) -> None:
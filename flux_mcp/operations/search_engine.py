@@ -1,13 +1,31 @@
 from __future__ import annotations
 
+import os
 import re
 import asyncio
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
 from dataclasses import dataclass
+import numpy as np
 
 from flux_mcp.core.memory_manager import MemoryManager
 from flux_mcp.core.metal_accelerator import MetalAccelerator, CompiledPattern
+from flux_mcp.utils.regex_cache import compile_regex
+
+# Bytes of line kept either side of a GPU match: 50 four-byte UTF-8
+# characters plus the tail of one cut in half at the window edge
+_CONTEXT_BYTES: int = 50 * 4 + 3
+
+# Line separators str.splitlines() honours besides '\n'
+_OTHER_LINE_BREAKS: re.Pattern = re.compile('[\r\v\f\x1c-\x1e\x85\u2028\u2029]')
+
+# Regex syntax that can look beyond the line a match sits on
+_CROSS_LINE_RE: re.Pattern = re.compile(r'\(\?<?[=!]|\\[AZ]')
+
+
+def _utf8_length(text: str) -> int:
+    # Offsets are reported in bytes of the file's UTF-8 encoding
+    return len(text.encode('utf-8', 'surrogatepass'))
 
 
 @dataclass
@@ -37,56 +55,80 @@ class MatchObject:
 
 
 class SearchEngine:
-    def __init__(self, memory_manager: MemoryManager, gpu_enabled: bool = True) -> None:
+    def __init__(self, memory_manager: MemoryManager, gpu_enabled: bool = True,
+                 gpu_min_bytes: int = 256 * 1024) -> None:
         self.memory_manager: MemoryManager = memory_manager
         self.gpu_enabled: bool = gpu_enabled
         self.metal_accelerator: MetalAccelerator | None = None
         
         if gpu_enabled:
             try:
-                self.metal_accelerator = MetalAccelerator()
+                self.metal_accelerator = MetalAccelerator.get(gpu_min_bytes)
             except Exception:
                 self.gpu_enabled = False
 
     async def search(self, file_path: Path, pattern: str, is_regex: bool = False,
-                    case_sensitive: bool = True, whole_word: bool = False) -> list[dict[str, Any]]:
+                    case_sensitive: bool = True, whole_word: bool = False,
+                    regex: re.Pattern | None = None, content: str | None = None) -> list[dict[str, Any]]:
         # Prepare pattern
         search_pattern: str = pattern
+        word_search: bool = whole_word and not is_regex
         
-        if whole_word and not is_regex:
+        if word_search:
             search_pattern = rf'\b{re.escape(pattern)}\b'
             is_regex = True
         
+        # A pattern with no cased characters matches the same either way,
+        # so skip folding every line of the file
+        if not case_sensitive and not is_regex and pattern.lower() == pattern.upper():
+            case_sensitive = True
+        
         if not case_sensitive and not is_regex:
             search_pattern = pattern.lower()
         
+        # One stat serves both the GPU heuristic and the read strategy
+        file_size: int = file_path.stat().st_size
+        
         # Compile pattern if GPU is available
         compiled_pattern: CompiledPattern | None = None
-        if self.metal_accelerator and self._should_use_gpu(file_path, pattern, is_regex):
+        if self.metal_accelerator and self._should_use_gpu(file_size, pattern, is_regex):
             compiled_pattern = self.metal_accelerator.compile_pattern(search_pattern, is_regex)
         
-        # Read file
-        content: str = await self._read_file(file_path)
-        
         # Perform search
         if compiled_pattern and compiled_pattern.metal_function:
-            matches: list[int] = self.metal_accelerator.search_gpu(
-                content.encode('utf-8'), compiled_pattern
-            )
-            results: list[SearchResult] = await self._process_gpu_matches(
-                content, matches, pattern
-            )
+            # Hand the GPU page-aligned file bytes instead of re-encoding content;
+            # its byte offsets are resolved against the same bytes
+            aligned, size = self.memory_manager.read_page_aligned(file_path)
+            try:
+                matches: np.ndarray = await self.metal_accelerator.search_gpu(
+                    aligned, compiled_pattern, size
+                )
+                results: list[SearchResult] = await self._process_gpu_matches(
+                    aligned, size, matches, compiled_pattern.pattern_length
+                )
+            finally:
+                aligned.close()
         else:
+            # Read file unless the caller already has it
+            if content is None:
+                content = await self._read_file(file_path, file_size)
+            
+            # Over ASCII text an ASCII word is bounded the same either way,
+            # and re.ASCII's \b test is far cheaper than the Unicode one.
+            # str.isascii() reads a flag CPython already keeps.
+            if word_search and pattern.isascii() and content.isascii():
+                regex = compile_regex(
+                    search_pattern, re.ASCII if case_sensitive else re.ASCII | re.IGNORECASE
+                )
             results = await self._search_cpu(
-                content, search_pattern, is_regex, case_sensitive
+                content, search_pattern, is_regex, case_sensitive, regex
             )
         
         # Convert to dict format
         return [self._result_to_dict(result) for result in results]
 
-    def _should_use_gpu(self, file_path: Path, pattern: str, is_regex: bool) -> bool:
+    def _should_use_gpu(self, file_size: int, pattern: str, is_regex: bool) -> bool:
         # Heuristics for GPU usage
-        file_size: int = file_path.stat().st_size
         pattern_complexity: int = len(pattern)
         
         # Use GPU for large files with simple patterns
@@ -99,27 +141,52 @@ class SearchEngine:
         
         return False
 
-    async def _read_file(self, file_path: Path) -> str:
-        if file_path.stat().st_size > self.memory_manager.config.memory_mapped_threshold:
+    async def _read_file(self, file_path: Path, file_size: int) -> str:
+        if file_size > self.memory_manager.config.memory_mapped_threshold:
             return await self.memory_manager.read_mapped_file(file_path)
         else:
             with open(file_path, 'r', encoding='utf-8') as f:
                 return f.read()
 
     async def _search_cpu(self, content: str, pattern: str, is_regex: bool,
-                         case_sensitive: bool) -> list[SearchResult]:
+                         case_sensitive: bool, regex: re.Pattern | None = None) -> list[SearchResult]:
+        # Whole-buffer scans number lines by '\n' alone, so they only agree
+        # with the splitlines() numbering below when no other break occurs
+        newline_only: bool = _OTHER_LINE_BREAKS.search(content) is None
+        
+        # Literal searches scan the whole buffer once instead of line by line,
+        # as long as case folding keeps offsets aligned with the original
+        if (not is_regex and newline_only and pattern
+                and '\n' not in pattern and '\r' not in pattern):
+            haystack: str = content if case_sensitive else content.lower()
+            if len(haystack) == len(content):
+                return self._search_buffer(
+                    content, haystack, pattern if case_sensitive else pattern.lower()
+                )
+        
         results: list[SearchResult] = []
-        lines: list[str] = content.splitlines()
         
-        # Prepare regex
-        if is_regex:
+        # Prepare regex unless the caller passed a precompiled one
+        if is_regex and regex is None:
             flags: int = 0 if case_sensitive else re.IGNORECASE
-            regex: re.Pattern = re.compile(pattern, flags)
+            regex = compile_regex(pattern, flags)
+        
+        # Only '\n' line breaks keep whole-buffer offsets in step with the
+        # splitlines() numbering below, and lookarounds or \A / \Z could see
+        # past a line's edges
+        if is_regex and newline_only and not _CROSS_LINE_RE.search(regex.pattern):
+            buffered: list[SearchResult] | None = self._search_regex_buffer(content, regex)
+            if buffered is not None:
+                return buffered
         
-        # Search line by line
+        # Search line by line; the kept line ends give each line's true
+        # start, whatever break precedes it
+        ascii_only: bool = content.isascii()
         byte_offset: int = 0
         
-        for line_num, line in enumerate(lines):
+        for line_num, (line, raw_line) in enumerate(
+            zip(content.splitlines(), content.splitlines(keepends=True))
+        ):
             matches: list[Any] = []
             
             if is_regex:
@@ -161,47 +228,120 @@ class SearchEngine:
                     match_text=match.group(),
                     context_before=context_before,
                     context_after=context_after,
-                    byte_offset=byte_offset + match_start
+                    byte_offset=byte_offset + (
+                        match_start if ascii_only else _utf8_length(line[:match_start])
+                    )
                 )
                 results.append(result)
             
-            byte_offset += len(line) + 1  # +1 for newline
+            byte_offset += len(raw_line) if ascii_only else _utf8_length(raw_line)
+        
+        return results
+
+    def _search_buffer(self, content: str, haystack: str, needle: str) -> list[SearchResult]:
+        # Positions come from the (possibly lowered) haystack; reported text
+        # and context are sliced from the original content. A needle without
+        # a newline never crosses a line, so there is always a result list.
+        def spans() -> Iterator[tuple[int, int]]:
+            pos: int = haystack.find(needle)
+            while pos != -1:
+                yield pos, pos + len(needle)
+                pos = haystack.find(needle, pos + 1)
+        
+        return self._results_from_spans(content, spans())
+
+    def _search_regex_buffer(self, content: str, regex: re.Pattern) -> list[SearchResult] | None:
+        # One finditer over the whole buffer finds what per-line finditer
+        # would, provided no match crosses a newline
+        if not regex.flags & re.MULTILINE:
+            regex = compile_regex(regex.pattern, regex.flags | re.MULTILINE)
+        
+        results: list[SearchResult] | None = self._results_from_spans(
+            content, (match.span() for match in regex.finditer(content))
+        )
+        
+        # splitlines() has no empty line after a trailing newline, or in an
+        # empty file, for an empty match to land on
+        if (results and results[-1].byte_offset == len(content)
+                and (not content or content[-1] == '\n')):
+            results.pop()
+        
+        return results
+
+    def _results_from_spans(self, content: str,
+                            spans: Iterable[tuple[int, int]]) -> list[SearchResult] | None:
+        results: list[SearchResult] = []
+        
+        # Spans arrive in order, and the lines skipped between two of them
+        # are counted in C rather than walked one at a time. None means a
+        # span ran past the end of its line. Byte offsets of non-ASCII text
+        # are the UTF-8 length of everything before the span.
+        ascii_only: bool = content.isascii()
+        encoded_chars: int = 0
+        encoded_bytes: int = 0
+        line_num: int = 0
+        line_start: int = 0
+        line_end: int = -1
+        for pos, match_end in spans:
+            if pos > line_end:
+                newline: int = content.rfind('\n', line_start, pos)
+                if newline != -1:
+                    line_num += content.count('\n', line_start, newline + 1)
+                    line_start = newline + 1
+                line_end = content.find('\n', pos)
+                if line_end == -1:
+                    line_end = len(content)
+            if match_end > line_end:
+                return None
+            if not ascii_only:
+                encoded_bytes += _utf8_length(content[encoded_chars:pos])
+                encoded_chars = pos
+            
+            result: SearchResult = SearchResult(
+                line_number=line_num,
+                column=pos - line_start,
+                match_text=content[pos:match_end],
+                context_before=content[max(line_start, pos - 50):pos],
+                context_after=content[match_end:min(line_end, match_end + 50)].rstrip('\r'),
+                byte_offset=pos if ascii_only else encoded_bytes
+            )
+            results.append(result)
         
         return results
 
-    async def _process_gpu_matches(self, content: str, match_positions: list[int],
-                                  pattern: str) -> list[SearchResult]:
+    async def _process_gpu_matches(self, data: Any, size: int, match_positions: np.ndarray,
+                                  pattern_length: int) -> list[SearchResult]:
         results: list[SearchResult] = []
-        lines: list[str] = content.splitlines()
         
-        # Build line offset index
-        line_offsets: list[int] = [0]
-        current_offset: int = 0
+        # Line starts come from one vectorised newline sweep over the bytes
+        # the GPU searched; no per-line strings are built
+        line_offsets: np.ndarray = self.memory_manager.line_offsets(data, size)
         
-        for line in lines:
-            current_offset += len(line) + 1
-            line_offsets.append(current_offset)
+        # One vectorised prefix-sum lookup resolves the line and column of
+        # every match
+        line_numbers: np.ndarray = np.searchsorted(line_offsets, match_positions, side='right') - 1
+        columns: np.ndarray = match_positions - line_offsets[line_numbers]
         
         # Process each match
-        for pos in match_positions:
-            # Find line number
-            line_num: int = 0
-            for i, offset in enumerate(line_offsets):
-                if offset > pos:
-                    line_num = i - 1
-                    break
-            
-            # Calculate column
-            line_start: int = line_offsets[line_num]
-            column: int = pos - line_start
+        for pos, line_num, column in zip(
+            match_positions.tolist(), line_numbers.tolist(), columns.tolist()
+        ):
+            line_start: int = pos - column
+            line_end: int = (
+                int(line_offsets[line_num + 1]) - 1 if line_num + 1 < len(line_offsets) else size
+            )
+            match_end: int = pos + pattern_length
             
             # Get match text
-            match_text: str = content[pos:pos + len(pattern)]
+            match_text: str = self._decode(data[pos:match_end])
             
             # Get context
-            line: str = lines[line_num]
-            context_before: str = line[:column][-50:]
-            context_after: str = line[column + len(pattern):][:50]
+            context_before: str = self._decode(
+                data[max(line_start, pos - _CONTEXT_BYTES):pos]
+            )[-50:]
+            context_after: str = self._decode(
+                data[match_end:min(line_end, match_end + _CONTEXT_BYTES)]
+            ).rstrip('\r')[:50]
             
             result: SearchResult = SearchResult(
                 line_number=line_num,
@@ -215,6 +355,10 @@ class SearchEngine:
         
         return results
 
+    def _decode(self, raw: bytes) -> str:
+        # Context windows are cut at byte offsets and may split a character
+        return str(raw, 'utf-8', 'replace')
+
     def _result_to_dict(self, result: SearchResult) -> dict[str, Any]:
         return {
             'line_number': result.line_number,
@@ -230,9 +374,28 @@ class SearchEngine:
                                    whole_word: bool = False) -> dict[str, list[dict[str, Any]]]:
         tasks: list[asyncio.Task] = []
         
-        for file_path in file_paths:
+        # Compile once for the whole batch rather than once per file
+        regex: re.Pattern | None = None
+        if is_regex or whole_word:
+            source: str = pattern if is_regex else re.escape(pattern)
+            if whole_word:
+                source = rf'\b{source}\b'
+            regex = compile_regex(source, 0 if case_sensitive else re.IGNORECASE)
+        
+        # Small files are all read in one executor call instead of one
+        # blocking read per task on the event loop
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        contents: list[str | Exception | None] = await loop.run_in_executor(
+            None, self._read_small_files_sync, file_paths
+        )
+        for content in contents:
+            if isinstance(content, Exception):
+                raise content
+        
+        for file_path, content in zip(file_paths, contents):
             task: asyncio.Task = asyncio.create_task(
-                self.search(file_path, pattern, is_regex, case_sensitive, whole_word)
+                self.search(file_path, pattern, is_regex, case_sensitive, whole_word,
+                            regex=regex, content=content)
             )
             tasks.append(task)
         
@@ -243,6 +406,22 @@ class SearchEngine:
             for file_path, result in zip(file_paths, results)
         }
 
+    def _read_small_files_sync(self, file_paths: list[Path]) -> list[str | Exception | None]:
+        # None leaves a file to the per-file path, which maps large files
+        threshold: int = self.memory_manager.config.memory_mapped_threshold
+        contents: list[str | Exception | None] = []
+        for file_path in file_paths:
+            try:
+                # Text mode translates newlines the same way _read_file does
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    if os.fstat(f.fileno()).st_size > threshold:
+                        contents.append(None)
+                        continue
+                    contents.append(f.read())
+            except Exception as e:
+                contents.append(e)
+        return contents
+
     def close(self) -> None:
         if self.metal_accelerator:
             self.metal_accelerator.cleanup()
@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+import os
 import re
+import ast
+import mmap
+import codecs
 import asyncio
+import difflib
+import builtins
+import platform
 from pathlib import Path
 from typing import Any, Optional, Union
 from dataclasses import dataclass
@@ -9,6 +16,28 @@ from dataclasses import dataclass
 from flux_mcp.core.transaction_manager import TransactionManager
 from flux_mcp.core.memory_manager import MemoryManager
 from flux_mcp.parsers import get_parser_for_file
+from flux_mcp.operations._levenshtein import levenshtein
+from flux_mcp.utils.encoding_detector import detect_sample_encoding
+from flux_mcp.utils.regex_cache import compile_regex
+
+_UTF8_DECODER = codecs.getincrementaldecoder('utf-8')
+
+# _replace_mmap validates a mapping as UTF-8 this many bytes at a time
+_VALIDATE_CHUNK_BYTES: int = 1024 * 1024
+
+# Literals containing any of these are matched against the decoded text
+_LINE_BREAK_RE: re.Pattern = re.compile('[\r\n]')
+
+# Syntax that needs a newer interpreter than the one validating the code
+_FSTRING_RE: re.Pattern = re.compile(r'f[\'"]')
+_POSONLY_RE: re.Pattern = re.compile(r'\([^)]*/, ')
+_DICT_UNION_RE: re.Pattern = re.compile(r'[\w\s][\]\}]\s*\|\s*[\{\[]')
+_MATCH_RE: re.Pattern = re.compile(r'\bmatch\b.*?:')
+_CASE_RE: re.Pattern = re.compile(r'\bcase\b.*?:')
+_UNION_RE: re.Pattern = re.compile(r':\s*\w+\s*\|\s*\w+')
+
+# Names a load never needs a visible definition for
+_BUILTIN_NAMES: frozenset[str] = frozenset(dir(builtins)) | {'self', 'cls', 'super'}
 
 
 @dataclass
@@ -52,7 +81,6 @@ class TextEditor:
         """
         # Basic syntax validation using AST parsing
         try:
-            import ast
             ast_tree = ast.parse(code)
         except SyntaxError as e:
             # Enhanced error reporting with detailed location and visualization
@@ -82,10 +110,6 @@ class TextEditor:
         
         # 1. Advanced feature detection for version compatibility
         try:
-            import sys
-            import re
-            import builtins
-            import platform
             
             # Detect current Python version
             current_python_version = tuple(map(int, platform.python_version_tuple()))
@@ -93,70 +117,90 @@ class TextEditor:
             # Feature compatibility checks - CRITICAL errors that BLOCK execution
             incompatible_features = []
             
-            # Check for Python 3.6+ features
-            if current_python_version < (3, 6):
-                # f-strings (Python 3.6+)
-                if re.search(r'f[\'"]', code):
-                    line_numbers = [i+1 for i, line in enumerate(code.splitlines()) if re.search(r'f[\'"]', line)]
-                    incompatible_features.append({
-                        "feature": "f-strings", 
-                        "min_version": "3.6",
-                        "line_numbers": line_numbers
-                    })
-            
-            # Check for Python 3.8+ features
-            if current_python_version < (3, 8):
-                # walrus operator := (Python 3.8+)
-                if re.search(r':=', code):
-                    line_numbers = [i+1 for i, line in enumerate(code.splitlines()) if ":=" in line]
-                    incompatible_features.append({
-                        "feature": "assignment expressions (walrus operator :=)", 
-                        "min_version": "3.8",
-                        "line_numbers": line_numbers
-                    })
-                    
-                # positional-only parameters (Python 3.8+)
-                if re.search(r'\([^)]*/, ', code):
-                    line_numbers = [i+1 for i, line in enumerate(code.splitlines()) if re.search(r'\([^)]*/, ', line)]
-                    incompatible_features.append({
-                        "feature": "positional-only parameters", 
-                        "min_version": "3.8",
-                        "line_numbers": line_numbers
-                    })
+            # One pass over the lines classifies each against every probe the
+            # running interpreter needs
+            before_36: bool = current_python_version < (3, 6)
+            before_38: bool = current_python_version < (3, 8)
+            before_39: bool = current_python_version < (3, 9)
+            before_310: bool = current_python_version < (3, 10)
+            
+            fstring_lines: list[int] = []
+            walrus_lines: list[int] = []
+            posonly_lines: list[int] = []
+            dict_union_lines: list[int] = []
+            match_case_lines: list[int] = []
+            union_lines: list[int] = []
+            has_match: bool = False
+            has_case: bool = False
+            
+            if before_310:
+                for number, line in enumerate(code.splitlines(), 1):
+                    if before_36 and _FSTRING_RE.search(line):
+                        fstring_lines.append(number)
+                    if before_38:
+                        if ":=" in line:
+                            walrus_lines.append(number)
+                        if _POSONLY_RE.search(line):
+                            posonly_lines.append(number)
+                    if before_39 and _DICT_UNION_RE.search(line):
+                        dict_union_lines.append(number)
                     
-            # Check for Python 3.9+ features  
-            if current_python_version < (3, 9):
-                # Dictionary union operators (Python 3.9+)
-                if re.search(r'[\w\s][\]\}]\s*\|\s*[\{\[]', code):
-                    line_numbers = [i+1 for i, line in enumerate(code.splitlines()) 
-                                  if re.search(r'[\w\s][\]\}]\s*\|\s*[\{\[]', line)]
-                    incompatible_features.append({
-                        "feature": "dictionary union operators", 
-                        "min_version": "3.9",
-                        "line_numbers": line_numbers
-                    })
-            
-            # Check for Python 3.10+ features
-            if current_python_version < (3, 10):
-                # match/case pattern matching (Python 3.10+)
-                if re.search(r'\bmatch\b.*?:', code) and re.search(r'\bcase\b.*?:', code):
-                    line_numbers = [i+1 for i, line in enumerate(code.splitlines()) 
-                                  if re.search(r'\bmatch\b.*?:', line) or re.search(r'\bcase\b.*?:', line)]
-                    incompatible_features.append({
-                        "feature": "match/case pattern matching", 
-                        "min_version": "3.10",
-                        "line_numbers": line_numbers
-                    })
-                
-                # union operator | in type hints (Python 3.10+)
-                if re.search(r':\s*\w+\s*\|\s*\w+', code):
-                    line_numbers = [i+1 for i, line in enumerate(code.splitlines()) 
-                                  if re.search(r':\s*\w+\s*\|\s*\w+', line)]
-                    incompatible_features.append({
-                        "feature": "union type operator |", 
-                        "min_version": "3.10",
-                        "line_numbers": line_numbers
-                    })
+                    line_has_match: bool = _MATCH_RE.search(line) is not None
+                    line_has_case: bool = _CASE_RE.search(line) is not None
+                    has_match = has_match or line_has_match
+                    has_case = has_case or line_has_case
+                    if line_has_match or line_has_case:
+                        match_case_lines.append(number)
+                    if _UNION_RE.search(line):
+                        union_lines.append(number)
+            
+            # f-strings (Python 3.6+)
+            if fstring_lines:
+                incompatible_features.append({
+                    "feature": "f-strings", 
+                    "min_version": "3.6",
+                    "line_numbers": fstring_lines
+                })
+            
+            # walrus operator := (Python 3.8+)
+            if walrus_lines:
+                incompatible_features.append({
+                    "feature": "assignment expressions (walrus operator :=)", 
+                    "min_version": "3.8",
+                    "line_numbers": walrus_lines
+                })
+            
+            # positional-only parameters (Python 3.8+)
+            if posonly_lines:
+                incompatible_features.append({
+                    "feature": "positional-only parameters", 
+                    "min_version": "3.8",
+                    "line_numbers": posonly_lines
+                })
+            
+            # Dictionary union operators (Python 3.9+)
+            if dict_union_lines:
+                incompatible_features.append({
+                    "feature": "dictionary union operators", 
+                    "min_version": "3.9",
+                    "line_numbers": dict_union_lines
+                })
+            
+            # match/case pattern matching (Python 3.10+)
+            if has_match and has_case:
+                incompatible_features.append({
+                    "feature": "match/case pattern matching", 
+                    "min_version": "3.10",
+                    "line_numbers": match_case_lines
+                })
+            
+            # union operator | in type hints (Python 3.10+)
+            if union_lines:
+                incompatible_features.append({
+                    "feature": "union type operator |", 
+                    "min_version": "3.10",
+                    "line_numbers": union_lines
+                })
 
             # Add more Python 3.11+ feature checks as needed
             
@@ -177,65 +221,68 @@ class TextEditor:
         # 2. Advanced static analysis for code quality and correctness
         try:
             # Track defined variables, imports, and function definitions
-            defined_vars = {}
+            defined_vars: set[str] = set()
             undefined_vars = []
             imports = []
             defined_funcs = []
             used_funcs = []
             dangerous_funcs = []
             
-            # Analyze the AST for various issues
+            # Analyze the AST for various issues. Breadth-first order matters:
+            # a module-level assignment must be seen before loads nested in
+            # functions defined above it. Exact type tests replace the
+            # isinstance chain; AST node classes are never subclassed.
             for node in ast.walk(ast_tree):
-                # Check for dangerous function calls 
-                if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
-                    func_name = node.func.id
-                    
-                    # Detect dangerous built-ins that could lead to security issues
-                    if func_name in ('eval', 'exec', '__import__'):
-                        dangerous_funcs.append({
-                            "name": func_name,
-                            "line": getattr(node, "lineno", "unknown"),
-                            "message": f"Dangerous built-in function '{func_name}' used, which is a security risk"
-                        })
-                        
+                kind: type = type(node)
+                
                 # Track variable definitions and usages
-                elif isinstance(node, ast.Name):
-                    if isinstance(node.ctx, ast.Store):
+                if kind is ast.Name:
+                    ctx: type = type(node.ctx)
+                    if ctx is ast.Store:
                         # Variable definition
-                        var_name = node.id
-                        defined_vars[var_name] = getattr(node, "lineno", -1)
-                    elif isinstance(node.ctx, ast.Load):
+                        defined_vars.add(node.id)
+                    elif ctx is ast.Load:
                         # Variable usage - check if it's defined
                         var_name = node.id
-                        if (var_name not in defined_vars and 
-                            var_name not in dir(builtins) and 
-                            var_name not in ('self', 'cls', 'super')):
+                        if var_name not in defined_vars and var_name not in _BUILTIN_NAMES:
                             undefined_vars.append({
                                 "name": var_name,
                                 "line": getattr(node, "lineno", "unknown")
                             })
                 
-                # Track imports
-                elif isinstance(node, (ast.Import, ast.ImportFrom)):
-                    if isinstance(node, ast.Import):
-                        for alias in node.names:
-                            imports.append({
-                                "module": alias.name,
-                                "alias": alias.asname,
-                                "line": getattr(node, "lineno", "unknown")
-                            })
-                    else:  # ImportFrom
-                        module = node.module or ""
-                        for alias in node.names:
-                            imports.append({
-                                "module": f"{module}.{alias.name}" if module else alias.name,
-                                "alias": alias.asname,
-                                "from_import": True,
-                                "line": getattr(node, "lineno", "unknown")
+                # Check for dangerous function calls 
+                elif kind is ast.Call:
+                    if type(node.func) is ast.Name:
+                        func_name = node.func.id
+                        
+                        # Detect dangerous built-ins that could lead to security issues
+                        if func_name in ('eval', 'exec', '__import__'):
+                            dangerous_funcs.append({
+                                "name": func_name,
+                                "line": getattr(node, "lineno", "unknown"),
+                                "message": f"Dangerous built-in function '{func_name}' used, which is a security risk"
                             })
                 
+                # Track imports
+                elif kind is ast.Import:
+                    for alias in node.names:
+                        imports.append({
+                            "module": alias.name,
+                            "alias": alias.asname,
+                            "line": getattr(node, "lineno", "unknown")
+                        })
+                elif kind is ast.ImportFrom:
+                    module = node.module or ""
+                    for alias in node.names:
+                        imports.append({
+                            "module": f"{module}.{alias.name}" if module else alias.name,
+                            "alias": alias.asname,
+                            "from_import": True,
+                            "line": getattr(node, "lineno", "unknown")
+                        })
+                
                 # Track function definitions and calls
-                elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                elif kind is ast.FunctionDef or kind is ast.AsyncFunctionDef:
                     func_name = node.name
                     defined_funcs.append({
                         "name": func_name,
@@ -425,41 +472,33 @@ class TextEditor:
         # All validation passed
         return True, ""
             
-    def _calculate_similarity(self, str1: str, str2: str) -> float:
-        """Calculate similarity between two strings using Levenshtein distance."""
+    def _calculate_similarity(self, str1: str, str2: str, min_ratio: float = 0.0) -> float:
+        """Calculate similarity between two strings using Levenshtein distance.
+        
+        Pairs that can't score above min_ratio return 0.0 without the full
+        distance being computed.
+        """
         if not str1 or not str2:
             return 0.0
             
         if str1 == str2:
             return 1.0
             
-        len1: int = len(str1)
-        len2: int = len(str2)
+        max_len: int = max(len(str1), len(str2))
         
-        matrix: list[list[int]] = [[0 for _ in range(len2 + 1)] for _ in range(len1 + 1)]
+        # The distance is at least the length difference
+        if abs(len(str1) - len(str2)) / max_len > 1.0 - min_ratio:
+            return 0.0
         
-        for i in range(len1 + 1):
-            matrix[i][0] = i
-        for j in range(len2 + 1):
-            matrix[0][j] = j
-            
-        for i in range(1, len1 + 1):
-            for j in range(1, len2 + 1):
-                cost: int = 0 if str1[i-1] == str2[j-1] else 1
-                matrix[i][j] = min(
-                    matrix[i-1][j] + 1,      # deletion
-                    matrix[i][j-1] + 1,      # insertion
-                    matrix[i-1][j-1] + cost  # substitution
-                )
-                
-        distance: int = matrix[len1][len2]
-        max_len: int = max(len1, len2)
+        max_distance: int = int(max_len * (1.0 - min_ratio))
+        distance: int = levenshtein(str1, str2, max_distance)
+        if distance > max_distance:
+            return 0.0
         
         return 1.0 - (distance / max_len)
     
     def _find_similar_targets(self, content: str, target: str) -> list[tuple[str, float]]:
         """Find similar targets in the content using fuzzy matching."""
-        import re
         
         pattern: re.Pattern = re.compile(r'(class|def)\s+(\w+)')
         matches: list[tuple[str, str]] = pattern.findall(content)
@@ -483,7 +522,7 @@ class TextEditor:
         
         similarities: list[tuple[str, float]] = []
         for t in targets:
-            similarity: float = self._calculate_similarity(target, t)
+            similarity: float = self._calculate_similarity(target, t, min_ratio=0.5)
             if similarity > 0.5:  # Threshold
                 similarities.append((t, similarity))
                 
@@ -493,7 +532,6 @@ class TextEditor:
         """Check method signature compatibility."""
         warnings: list[str] = []
         
-        import re
         orig_sig = re.search(r'def\s+(\w+)\s*\((.*?)\)', original)
         new_sig = re.search(r'def\s+(\w+)\s*\((.*?)\)', replacement)
         
@@ -527,12 +565,47 @@ class TextEditor:
 
     async def replace(self, file_path: Path, old_text: str, new_text: str,
                      is_regex: bool = False, all_occurrences: bool = True) -> int:
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        
+        # Line breaks are matched as the file spells them, which takes the
+        # decoded path; other UTF-8 literals are replaced byte for byte out
+        # of a mapping, with no decoded copy of the file held alongside
+        literal: bool = not is_regex and bool(old_text) and not _LINE_BREAK_RE.search(
+            old_text + new_text
+        )
+        if literal:
+            replaced: tuple[bytearray, int] | None = await loop.run_in_executor(
+                None, self._replace_mmap, file_path,
+                old_text.encode('utf-8'), new_text.encode('utf-8'),
+                -1 if all_occurrences else 1
+            )
+            if replaced is not None:
+                new_bytes: bytearray
+                replaced_count: int
+                new_bytes, replaced_count = replaced
+                if replaced_count > 0:
+                    await self._write_file_bytes(file_path, new_bytes)
+                return replaced_count
+        
+        # A literal that isn't in the file needs no read, decode or write-back
+        if literal and old_text.isascii():
+            found: bool = await loop.run_in_executor(
+                None, self._contains_ascii, file_path, old_text
+            )
+            if not found:
+                return 0
+        
         # Read file content
         content: str = await self._read_file_content(file_path)
         
+        # Literal line breaks follow the file's own, as in text_replace
+        if not is_regex and '\r\n' in content and '\r' not in old_text + new_text:
+            old_text = old_text.replace('\n', '\r\n')
+            new_text = new_text.replace('\n', '\r\n')
+        
         # Perform replacements
         if is_regex:
-            pattern: re.Pattern = re.compile(old_text)
+            pattern: re.Pattern = compile_regex(old_text)
             if all_occurrences:
                 new_content: str
                 count: int
@@ -546,7 +619,12 @@ class TextEditor:
                     new_content = content
                     count = 0
         else:
-            if all_occurrences:
+            if all_occurrences and old_text:
+                # One scan finds every occurrence; the join reuses the pieces
+                parts: list[str] = content.split(old_text)
+                count = len(parts) - 1
+                new_content = new_text.join(parts) if count else content
+            elif all_occurrences:
                 new_content = content.replace(old_text, new_text)
                 count = content.count(old_text)
             else:
@@ -564,6 +642,124 @@ class TextEditor:
         
         return count
 
+    def _contains_ascii(self, file_path: Path, text: str) -> bool:
+        # ASCII encodes to the same bytes in UTF-8, latin-1 and the other
+        # codecs a read can fall back to, so a raw memchr-speed find over the
+        # mapping is exact. UTF-16/32 files are left to the full path.
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:2] in (b'\xff\xfe', b'\xfe\xff') or mm[:4] == b'\x00\x00\xfe\xff':
+                    return True
+                return mm.find(text.encode('ascii')) != -1
+
+    def _replace_mmap(self, file_path: Path, old_bytes: bytes, new_bytes: bytes,
+                      limit: int = -1) -> tuple[bytearray, int] | None:
+        # UTF-8 is self-synchronising, so a byte-level find can't land inside
+        # another character. None leaves files that don't look like UTF-8
+        # to the decoding path.
+        with open(file_path, 'rb') as f:
+            size: int = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return bytearray(), 0
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Every byte is checked, in bounded pieces, since a file that
+                # only starts out as UTF-8 can't be edited as UTF-8
+                decoder: codecs.IncrementalDecoder = _UTF8_DECODER()
+                try:
+                    for start in range(0, size, _VALIDATE_CHUNK_BYTES):
+                        decoder.decode(mm[start:start + _VALIDATE_CHUNK_BYTES], False)
+                    decoder.decode(b'', True)
+                except UnicodeDecodeError:
+                    return None
+                
+                # Non-overlapping, left to right, like str.replace; a
+                # negative limit means every occurrence
+                positions: list[int] = []
+                pos: int = mm.find(old_bytes)
+                while pos != -1 and len(positions) != limit:
+                    positions.append(pos)
+                    pos = mm.find(old_bytes, pos + len(old_bytes))
+                
+                if not positions:
+                    return bytearray(), 0
+                
+                # Sized up front; inter-match runs are copied view to view
+                result: bytearray = bytearray(
+                    size + len(positions) * (len(new_bytes) - len(old_bytes))
+                )
+                with memoryview(mm) as source, memoryview(result) as target:
+                    read: int = 0
+                    written: int = 0
+                    for pos in positions:
+                        run: int = pos - read
+                        target[written:written + run] = source[read:pos]
+                        written += run
+                        target[written:written + len(new_bytes)] = new_bytes
+                        written += len(new_bytes)
+                        read = pos + len(old_bytes)
+                    target[written:] = source[read:]
+                
+                return result, len(positions)
+
+    def _file_encoding(self, file_path: Path) -> str:
+        with open(file_path, 'rb') as f:
+            stat: os.stat_result = os.fstat(f.fileno())
+            cache_key: tuple[Path, int, int] = (file_path, stat.st_mtime_ns, stat.st_size)
+            encoding: str | None = self.memory_manager.encoding_cache_get(cache_key)
+            if encoding is None:
+                encoding = detect_sample_encoding(f.read(4096))
+                self.memory_manager.encoding_cache_put(cache_key, encoding)
+        return encoding
+
+    async def _read_file_content(self, file_path: Path) -> str:
+        # Line endings are kept as stored, so the text can be written back
+        # byte for byte wherever it wasn't edited
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        encoding: str = await loop.run_in_executor(None, self._file_encoding, file_path)
+        content: bytes = await loop.run_in_executor(None, file_path.read_bytes)
+        return content.decode(encoding)
+
+    async def _write_file_content(self, file_path: Path, content: str) -> None:
+        # The file is unchanged since it was read, so its cached encoding holds
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        encoding: str = await loop.run_in_executor(None, self._file_encoding, file_path)
+        await self._write_file_bytes(file_path, content.encode(encoding))
+
+    def _line_ending(self, file_path: Path) -> str:
+        # Same sample-based majority vote text_replace uses
+        with open(file_path, 'rb') as f:
+            sample: bytes = f.read(4096)
+        crlf_count: int = sample.count(b'\r\n')
+        lf_count: int = sample.count(b'\n') - crlf_count
+        return '\r\n' if crlf_count > lf_count else '\n'
+
+    async def _read_file_lines(self, file_path: Path) -> list[str]:
+        # Lines are split on the file's own ending and carry no terminator;
+        # a final ending leaves an empty last line, so joining them back
+        # reproduces the text exactly
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        content: str = await self._read_file_content(file_path)
+        line_ending: str = await loop.run_in_executor(None, self._line_ending, file_path)
+        return content.split(line_ending)
+
+    async def _write_file_lines(self, file_path: Path, lines: list[str]) -> None:
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        line_ending: str = await loop.run_in_executor(None, self._line_ending, file_path)
+        await self._write_file_content(file_path, line_ending.join(lines))
+
+    async def _write_file_bytes(self, file_path: Path, content: bytes | bytearray) -> None:
+        transaction_id: str = await self.transaction_manager.begin()
+        try:
+            await self.transaction_manager.acquire_file_lock(transaction_id, file_path)
+            await self.transaction_manager.write_to_temp(transaction_id, file_path, content)
+            await self.transaction_manager.commit(transaction_id)
+        except Exception:
+            await self.transaction_manager.rollback(transaction_id)
+            raise
+
     async def insert_text(self, file_path: Path, line_number: int, 
                          column: int, text: str) -> None:
         lines: list[str] = await self._read_file_lines(file_path)
@@ -578,6 +774,9 @@ class TextEditor:
         if column < 0 or column > len(line):
             raise ValueError(f"Invalid column: {column}")
         
+        if not text:
+            return
+        
         # Insert text
         new_line: str = line[:column] + text + line[column:]
         lines[line_number] = new_line
@@ -602,23 +801,20 @@ class TextEditor:
             new_line: str = line[:text_range.start_column] + line[text_range.end_column:]
             lines[text_range.start_line] = new_line
         else:
-            # Multi-line deletion
-            for i in range(text_range.start_line, text_range.end_line + 1):
-                if i == text_range.start_line:
-                    deleted_text += lines[i][text_range.start_column:] + '\n'
-                    lines[i] = lines[i][:text_range.start_column]
-                elif i == text_range.end_line:
-                    deleted_text += lines[i][:text_range.end_column]
-                    lines[i] = lines[i][text_range.end_column:]
-                else:
-                    deleted_text += lines[i] + '\n'
-                    lines[i] = ""
-            
-            # Merge first and last lines
-            lines[text_range.start_line] += lines[text_range.end_line]
-            
-            # Remove empty lines in between
-            del lines[text_range.start_line + 1:text_range.end_line + 1]
+            # Multi-line deletion; the deleted text is joined once rather
+            # than grown line by line
+            first: str = lines[text_range.start_line]
+            last: str = lines[text_range.end_line]
+            deleted_text = '\n'.join([
+                first[text_range.start_column:],
+                *lines[text_range.start_line + 1:text_range.end_line],
+                last[:text_range.end_column]
+            ])
+            
+            # Merge first and last lines, dropping everything in between
+            lines[text_range.start_line:text_range.end_line + 1] = [
+                first[:text_range.start_column] + last[text_range.end_column:]
+            ]
         
         # Write back
         await self._write_file_lines(file_path, lines)
@@ -651,6 +847,10 @@ class TextEditor:
         if target_line < 0 or target_line > len(lines):
             raise ValueError("Invalid target line")
         
+        # Moving a block to its own start or just past its end changes nothing
+        if target_line == start_line or target_line == end_line + 1:
+            return
+        
         # Extract lines to move
         moving_lines: list[str] = lines[start_line:end_line + 1]
         
@@ -681,21 +881,31 @@ class TextEditor:
         else:
             raise ValueError(f"Unknown transformation: {transformation}")
         
+        # Already-converted text costs a memcmp here instead of a rewrite
+        if new_content == content:
+            return
+        
         await self._write_file_content(file_path, new_content)
 
     async def trim_whitespace(self, file_path: Path, mode: str = "trailing") -> None:
         lines: list[str] = await self._read_file_lines(file_path)
+        trimmed: list[str]
         
         if mode == "trailing":
-            lines = [line.rstrip() for line in lines]
+            trimmed = [line.rstrip() for line in lines]
         elif mode == "leading":
-            lines = [line.lstrip() for line in lines]
+            trimmed = [line.lstrip() for line in lines]
         elif mode == "both":
-            lines = [line.strip() for line in lines]
+            trimmed = [line.strip() for line in lines]
         else:
             raise ValueError(f"Unknown trim mode: {mode}")
         
-        await self._write_file_lines(file_path, lines)
+        # strip() hands back the same object for a line it leaves alone, so
+        # an already-clean file compares by identity without touching text
+        if trimmed == lines:
+            return
+        
+        await self._write_file_lines(file_path, trimmed)
         
     async def text_replace(self, file_path: Path, highlight: Union[str, dict[str, Any]], 
                           replace_with: str, checkpoint: Optional[str] = None, 
@@ -708,11 +918,14 @@ class TextEditor:
             
         # Detect file encoding and line endings
         try:
-            import chardet
             with open(file_path, 'rb') as f:
                 sample: bytes = f.read(4096)
-                encoding_result: dict[str, Any] = chardet.detect(sample)
-                encoding: str = encoding_result['encoding'] or 'utf-8'
+                stat: os.stat_result = os.fstat(f.fileno())
+                cache_key: tuple[Path, int, int] = (file_path, stat.st_mtime_ns, stat.st_size)
+                encoding: str | None = self.memory_manager.encoding_cache_get(cache_key)
+                if encoding is None:
+                    encoding = detect_sample_encoding(sample)
+                    self.memory_manager.encoding_cache_put(cache_key, encoding)
                 
                 # Check line endings
                 crlf_count: int = sample.count(b'\r\n')
@@ -1175,7 +1388,6 @@ class TextEditor:
             new_content: str = parser.apply_replacement(content, result, replace_with)
             
             # Generate diff for preview or dry run
-            import difflib
             diff: list[str] = list(difflib.unified_diff(
                 content.splitlines(),
                 new_content.splitlines(),
@@ -1243,7 +1455,6 @@ class TextEditor:
         if not content:
             content = await self._read_file_content(file_path)
             
-        import re
         
         pattern: re.Pattern = re.compile(r'(class|def)\s+(\w+)')
         matches: list[tuple[str, str]] = pattern.findall(content)
@@ -1283,7 +1494,7 @@ class TextEditor:
         # Calculate similarities
         similarities: list[tuple[str, float]] = []
         for t in targets:
-            similarity: float = self._calculate_similarity(target, t)
+            similarity: float = self._calculate_similarity(target, t, min_ratio=0.5)
             if similarity > 0.5:  # Threshold for suggestions
                 similarities.append((t, similarity))
         
@@ -1367,12 +1578,10 @@ class TextEditor:
             return result_data
             
         # Try to perform basic text replacement
-        import re
         if re.search(match_pattern, content):
             new_content: str = re.sub(match_pattern, replace_with, content)
             
             # Generate diff
-            import difflib
             diff: list[str] = list(difflib.unified_diff(
                 content.splitlines(),
                 new_content.splitlines(),
@@ -1424,8 +1633,7 @@ class TextEditor:
         
         # Validate regex pattern
         try:
-            import re
-            regex: re.Pattern = re.compile(pattern, re.DOTALL)
+            regex: re.Pattern = compile_regex(pattern, re.DOTALL)
         except re.error as e:
             result_data["errors"].append(f"Invalid regex pattern: {e}")
             result_data["message"] = f"ERROR: Invalid regex pattern: {e}"
@@ -1470,7 +1678,6 @@ class TextEditor:
                 new_content = new_content[:start_pos] + replaced_text + new_content[end_pos:]
             
             # Generate diff
-            import difflib
             diff: list[str] = list(difflib.unified_diff(
                 content.splitlines(),
                 new_content.splitlines(),
@@ -1584,7 +1791,6 @@ class TextEditor:
             new_content: str = "".join(new_lines)
             
             # Generate diff
-            import difflib
             diff: list[str] = list(difflib.unified_diff(
                 content.splitlines(),
                 new_content.splitlines(),
@@ -1698,7 +1904,6 @@ class TextEditor:
                     error_messages.append(f"Failed to replace '{target}': {str(e)}")
             
             # Generate diff
-            import difflib
             diff: list[str] = list(difflib.unified_diff(
                 content.splitlines(),
                 new_content.splitlines(),
@@ -1853,8 +2058,6 @@ class TextEditor:
         type_issues: list[dict[str, Any]] = []
         
         try:
-            import ast
-            import re
             
             # Parse both code blocks
             try:
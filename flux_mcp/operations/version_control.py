@@ -2,12 +2,31 @@ from __future__ import annotations
 
 import sqlite3
 import asyncio
+import hashlib
 import json
 from pathlib import Path
 from datetime import datetime
 from typing import Any
 from dataclasses import dataclass, asdict
 
+# blake3 hashes multi-megabyte checkpoints several times faster than sha256
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+
+# Recorded in each checkpoint's metadata, since content_hash is a bare
+# hex digest from whichever algorithm the install has
+_HASH_ALGORITHM: str = 'blake3' if BLAKE3_AVAILABLE else 'sha256'
+
+
+def _content_hash(content: bytes) -> str:
+    if BLAKE3_AVAILABLE:
+        return blake3(content, max_threads=blake3.AUTO).hexdigest()
+    return hashlib.sha256(content).hexdigest()
+
 
 @dataclass
 class Checkpoint:
@@ -82,10 +101,11 @@ class VersionControl:
     async def create_checkpoint(self, name: str, file_path: Path, 
                               content: bytes, metadata: dict[str, Any] | None = None) -> str:
         import uuid
-        import hashlib
         
+        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
         checkpoint_id: str = str(uuid.uuid4())
-        content_hash: str = hashlib.sha256(content).hexdigest()
+        # Hashing a large checkpoint is real CPU work; keep it off the loop
+        content_hash: str = await loop.run_in_executor(None, _content_hash, content)
         
         checkpoint: Checkpoint = Checkpoint(
             id=checkpoint_id,
@@ -94,10 +114,9 @@ class VersionControl:
             file_path=file_path,
             content_hash=content_hash,
             content=content,
-            metadata=metadata or {}
+            metadata={**(metadata or {}), 'hash_algorithm': _HASH_ALGORITHM}
         )
         
-        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
         await loop.run_in_executor(None, self._save_checkpoint, checkpoint)
         
         return checkpoint_id
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+import traceback
 from typing import Any
 from dataclasses import dataclass
 from mcp.server import Server, NotificationOptions
@@ -20,6 +21,9 @@ class ServerConfig:
     worker_count: int = 15  
     cache_size: int = 1024 * 1024 * 1024  # 1GB
     gpu_enabled: bool = False  # Disable GPU for now since it has issues
+    io_thread_count: int = 4
+    debug_mode: bool = False
+    gpu_min_bytes: int = 256 * 1024
 
 
 class FluxServer:
@@ -156,27 +160,29 @@ class FluxServer:
                     return [types.TextContent(type="text", text=f"Unknown tool: {name}")]
                     
             except Exception as e:
-                import traceback
                 error_msg: str = f"Error in {name}: {str(e)}\n{traceback.format_exc()}"
                 return [types.TextContent(type="text", text=error_msg)]
 
     async def run(self) -> None:
         import mcp.server.stdio
         
-        # Run the server using stdin/stdout streams
-        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream, 
-                write_stream,
-                InitializationOptions(
-                    server_name="flux-text-editor",
-                    server_version="0.3.0",  # Updated for enhanced text replacement
-                    capabilities=self.server.get_capabilities(
-                        notification_options=NotificationOptions(),
-                        experimental_capabilities={},
+        try:
+            # Run the server using stdin/stdout streams
+            async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream, 
+                    write_stream,
+                    InitializationOptions(
+                        server_name="flux-text-editor",
+                        server_version="0.3.0",  # Updated for enhanced text replacement
+                        capabilities=self.server.get_capabilities(
+                            notification_options=NotificationOptions(),
+                            experimental_capabilities={},
+                        ),
                     ),
-                ),
-            )
+                )
+        finally:
+            await self.engine.aclose()
 
 
 if __name__ == "__main__":
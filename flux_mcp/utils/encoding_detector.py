@@ -1,10 +1,36 @@
 from __future__ import annotations
 
+import codecs
 import chardet
 from pathlib import Path
 from typing import Any
 from dataclasses import dataclass
 
+# Statistical detectors, fastest first; chardet stays the pure-Python fallback
+try:
+    import cchardet
+    CCHARDET_AVAILABLE = True
+except ImportError:
+    CCHARDET_AVAILABLE = False
+
+try:
+    import charset_normalizer
+    CHARSET_NORMALIZER_AVAILABLE = True
+except ImportError:
+    CHARSET_NORMALIZER_AVAILABLE = False
+
+_UTF8_DECODER = codecs.getincrementaldecoder('utf-8')
+
+# Codecs that consume the byte order mark _check_bom found, so decoded
+# text doesn't start with U+FEFF
+_BOM_CODECS: dict[str, str] = {
+    'utf-32-le': 'utf-32',
+    'utf-32-be': 'utf-32',
+    'utf-16-le': 'utf-16',
+    'utf-16-be': 'utf-16',
+    'utf-8-sig': 'utf-8-sig',
+}
+
 
 @dataclass
 class EncodingInfo:
@@ -13,6 +39,59 @@ class EncodingInfo:
     language: str | None
     
 
+def _check_bom(content: bytes) -> str | None:
+    # Check for Byte Order Mark
+    if content.startswith(b'\xff\xfe\x00\x00'):
+        return 'utf-32-le'
+    elif content.startswith(b'\x00\x00\xfe\xff'):
+        return 'utf-32-be'
+    elif content.startswith(b'\xff\xfe'):
+        return 'utf-16-le'
+    elif content.startswith(b'\xfe\xff'):
+        return 'utf-16-be'
+    elif content.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    
+    return None
+
+
+def detect_sample_encoding(sample: bytes) -> str:
+    # Byte order marks settle it without decoding anything
+    bom_encoding: str | None = _check_bom(sample)
+    if bom_encoding:
+        return _BOM_CODECS[bom_encoding]
+    
+    # Most files are UTF-8, and CPython's decoder validates a sample far
+    # faster than a statistical detector; the sample may end mid-character
+    try:
+        _UTF8_DECODER().decode(sample, False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    
+    # C-backed detectors first, pure-Python chardet as the last resort
+    detected: str | None = None
+    if CCHARDET_AVAILABLE:
+        detected = cchardet.detect(sample)['encoding']
+    elif CHARSET_NORMALIZER_AVAILABLE:
+        best: Any = charset_normalizer.from_bytes(sample).best()
+        detected = best.encoding if best is not None else None
+    else:
+        detected = chardet.detect(sample)['encoding']
+    if detected:
+        return detected
+    
+    # BOM-less UTF-16 text is full of NUL bytes; anything else decodes as latin-1
+    if b'\x00' in sample and len(sample) % 2 == 0:
+        try:
+            sample.decode('utf-16')
+            return 'utf-16'
+        except UnicodeDecodeError:
+            pass
+    
+    return 'latin-1'
+
+
 class EncodingDetector:
     def __init__(self) -> None:
         self.common_encodings: list[str] = [
@@ -67,19 +146,7 @@ class EncodingDetector:
         )
 
     def _check_bom(self, content: bytes) -> str | None:
-        # Check for Byte Order Mark
-        if content.startswith(b'\xff\xfe\x00\x00'):
-            return 'utf-32-le'
-        elif content.startswith(b'\x00\x00\xfe\xff'):
-            return 'utf-32-be'
-        elif content.startswith(b'\xff\xfe'):
-            return 'utf-16-le'
-        elif content.startswith(b'\xfe\xff'):
-            return 'utf-16-be'
-        elif content.startswith(b'\xef\xbb\xbf'):
-            return 'utf-8-sig'
-        
-        return None
+        return _check_bom(content)
 
     def convert_encoding(self, content: bytes, from_encoding: str, 
                         to_encoding: str, errors: str = 'strict') -> bytes:
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any
+
+# google-re2 gives linear-time matching for user-supplied patterns
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+
+@lru_cache(maxsize=1024)
+def compile_regex(pattern: str | bytes, flags: int = 0, linear: bool = False) -> re.Pattern:
+    # One process-wide cache for user patterns, independent of re's own,
+    # which every other module churns. linear asks for RE2 where it is
+    # installed and the pattern is within its syntax.
+    if linear and RE2_AVAILABLE and not flags & ~re.IGNORECASE:
+        options: Any = re2.Options()
+        options.case_sensitive = not flags & re.IGNORECASE
+        try:
+            return re2.compile(pattern, options)
+        except re2.error:
+            # Backreferences and lookaround need the backtracking engine
+            pass
+
+    return re.compile(pattern, flags)
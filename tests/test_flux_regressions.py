@@ -0,0 +1,501 @@
+from __future__ import annotations
+
+import os
+import errno
+import hashlib
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+from dataclasses import dataclass
+import traceback
+
+from flux_mcp.server import ServerConfig
+from flux_mcp.core.flux_engine import FluxEngine, EngineConfig
+from flux_mcp.core.transaction_manager import TransactionManager
+from flux_mcp.core.memory_manager import MemoryManager
+from flux_mcp.operations.file_handler import FileHandler
+from flux_mcp.operations.text_editor import TextEditor, TextRange
+from flux_mcp.operations.search_engine import SearchEngine
+from flux_mcp.operations.version_control import VersionControl, Checkpoint
+
+
+@dataclass
+class TestResult:
+    test_name: str
+    passed: bool
+    duration: float
+    error: str | None = None
+    details: dict[str, Any] | None = None
+
+
+class RegressionTester:
+    def __init__(self) -> None:
+        self.test_dir: Path = Path(tempfile.mkdtemp(prefix="flux_regress_"))
+        config: ServerConfig = ServerConfig()
+
+        self.transaction_manager: TransactionManager = TransactionManager()
+        self.memory_manager: MemoryManager = MemoryManager(config)
+        self.file_handler: FileHandler = FileHandler(self.transaction_manager, self.memory_manager)
+        self.text_editor: TextEditor = TextEditor(self.transaction_manager, self.memory_manager)
+        self.search_engine: SearchEngine = SearchEngine(self.memory_manager, gpu_enabled=False)
+
+        self.results: list[TestResult] = []
+
+    async def cleanup(self) -> None:
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    async def test_failed_commit_rolls_back(self) -> TestResult:
+        start_time: float = time.time()
+        try:
+            file_a: Path = self.test_dir / "commit_a.txt"
+            file_b: Path = self.test_dir / "commit_b.txt"
+            file_a.write_text("A0\n")
+            file_b.write_text("B0\n")
+
+            transaction_id: str = await self.transaction_manager.begin()
+            await self.transaction_manager.acquire_file_lock(transaction_id, file_a)
+            await self.transaction_manager.acquire_file_lock(transaction_id, file_b)
+            await self.transaction_manager.write_to_temp(transaction_id, file_a, b"A1\n")
+            await self.transaction_manager.write_to_temp(transaction_id, file_b, b"B1\n")
+
+            # Publish the first file, then fail on the second
+            link_temp = self.transaction_manager._link_temp_sync
+            calls: list[Path] = []
+
+            def failing_link(temp_fd: int, file_path: Path) -> Path:
+                calls.append(file_path)
+                if len(calls) == 2:
+                    raise OSError("Simulated link failure")
+                return link_temp(temp_fd, file_path)
+
+            self.transaction_manager._link_temp_sync = failing_link
+            try:
+                await self.transaction_manager.commit(transaction_id)
+                raise AssertionError("commit should have failed")
+            except OSError:
+                pass
+            finally:
+                del self.transaction_manager._link_temp_sync
+
+            assert file_a.read_text() == "A1\n"
+
+            # The failed transaction is still known and can be undone
+            await self.transaction_manager.rollback(transaction_id)
+
+            assert file_a.read_text() == "A0\n"
+            assert file_b.read_text() == "B0\n"
+            assert transaction_id not in self.transaction_manager.transactions
+
+            return TestResult(
+                test_name="Failed Commit Rollback",
+                passed=True,
+                duration=time.time() - start_time
+            )
+        except Exception as e:
+            return TestResult(
+                test_name="Failed Commit Rollback",
+                passed=False,
+                duration=time.time() - start_time,
+                error=f"{str(e)}\n{traceback.format_exc()}"
+            )
+
+    async def test_search_line_breaks_and_offsets(self) -> TestResult:
+        start_time: float = time.time()
+        try:
+            # Lines split by '\r' and '\f' are numbered as splitlines() sees them
+            content: str = "foo\rbar foo\x0cfoo\nfoo"
+            for is_regex in (False, True):
+                results = await self.search_engine._search_cpu(content, "foo", is_regex, True)
+                assert [r.line_number for r in results] == [0, 1, 2, 3]
+                assert [r.column for r in results] == [0, 4, 0, 0]
+
+            # Offsets into non-ASCII text count bytes of the UTF-8 file
+            test_file: Path = self.test_dir / "offsets.txt"
+            data: bytes = "café foo\nnaïve — foo\n€ foo\n".encode("utf-8")
+            test_file.write_bytes(data)
+            expected: list[int] = [i for i in range(len(data)) if data.startswith(b"foo", i)]
+
+            for is_regex in (False, True):
+                matches: list[dict[str, Any]] = await self.search_engine.search(
+                    test_file, "foo", is_regex=is_regex
+                )
+                assert [m["byte_offset"] for m in matches] == expected
+                assert [m["line_number"] for m in matches] == [0, 1, 2]
+
+            return TestResult(
+                test_name="Search Line Breaks And Offsets",
+                passed=True,
+                duration=time.time() - start_time
+            )
+        except Exception as e:
+            return TestResult(
+                test_name="Search Line Breaks And Offsets",
+                passed=False,
+                duration=time.time() - start_time,
+                error=f"{str(e)}\n{traceback.format_exc()}"
+            )
+
+    async def test_multi_file_search_matches_search(self) -> TestResult:
+        start_time: float = time.time()
+        try:
+            files: list[Path] = []
+            for name, text in (("crlf.txt", "foo a\r\nb foo\r\nfoo\r\n"),
+                               ("cr.txt", "foo a\rb foo\rfoo\r")):
+                path: Path = self.test_dir / name
+                path.write_bytes(text.encode("utf-8"))
+                files.append(path)
+
+            for is_regex in (False, True):
+                batched: dict[str, list[dict[str, Any]]] = await self.search_engine.search_multiple_files(
+                    files, "foo", is_regex=is_regex
+                )
+                for path in files:
+                    single: list[dict[str, Any]] = await self.search_engine.search(
+                        path, "foo", is_regex=is_regex
+                    )
+                    assert batched[str(path)] == single
+                    assert [m["line_number"] for m in single] == [0, 1, 2]
+
+            return TestResult(
+                test_name="Multi-File Search Matches Search",
+                passed=True,
+                duration=time.time() - start_time
+            )
+        except Exception as e:
+            return TestResult(
+                test_name="Multi-File Search Matches Search",
+                passed=False,
+                duration=time.time() - start_time,
+                error=f"{str(e)}\n{traceback.format_exc()}"
+            )
+
+    async def test_bom_detection(self) -> TestResult:
+        start_time: float = time.time()
+        try:
+            # Every reader shares one detector, so a UTF-16 file decodes the
+            # same way whichever path reads it
+            text: str = "héllo\nwörld\n"
+            for codec in ("utf-16", "utf-32"):
+                test_file: Path = self.test_dir / f"{codec}.txt"
+                test_file.write_bytes(text.encode(codec))
+
+                content: str = await self.file_handler.read_file(test_file, None, None, None)
+                assert content == text
+
+                mapped: str = await self.memory_manager.read_mapped_file(test_file)
+                assert mapped == text
+
+            return TestResult(
+                test_name="BOM Detection",
+                passed=True,
+                duration=time.time() - start_time
+            )
+        except Exception as e:
+            return TestResult(
+                test_name="BOM Detection",
+                passed=False,
+                duration=time.time() - start_time,
+                error=f"{str(e)}\n{traceback.format_exc()}"
+            )
+
+    async def test_replace_line_breaks_and_encoding(self) -> TestResult:
+        start_time: float = time.time()
+        try:
+            # A '\n' in either literal follows the file's CRLF line endings
+            crlf_file: Path = self.test_dir / "crlf_replace.txt"
+            crlf_file.write_bytes(b"one\r\ntwo\r\nthree\r\n")
+            count: int = await self.text_editor.replace(crlf_file, "one\ntwo", "1\n2")
+            assert count == 1
+            assert crlf_file.read_bytes() == b"1\r\n2\r\nthree\r\n"
+
+            # Bytes past the first KiB that aren't UTF-8 keep the file off
+            # the byte-level path
+            latin_file: Path = self.test_dir / "latin_replace.txt"
+            latin_file.write_bytes(b"x" * 2000 + "café\n".encode("latin-1"))
+            count = await self.text_editor.replace(latin_file, "café", "cafe")
+            assert count == 1
+            assert latin_file.read_bytes() == b"x" * 2000 + b"cafe\n"
+
+            return TestResult(
+                test_name="Replace Line Breaks And Encoding",
+                passed=True,
+                duration=time.time() - start_time
+            )
+        except Exception as e:
+            return TestResult(
+                test_name="Replace Line Breaks And Encoding",
+                passed=False,
+                duration=time.time() - start_time,
+                error=f"{str(e)}\n{traceback.format_exc()}"
+            )
+
+    async def test_copy_file(self) -> TestResult:
+        start_time: float = time.time()
+        try:
+            # Each copy_file_range call asks for at most what is left
+            requested: list[int] = []
+            copy_file_range = getattr(os, "copy_file_range", None)
+
+            def recording_copy(src: int, dst: int, count: int, *args: Any) -> int:
+                requested.append(count)
+                return copy_file_range(src, dst, count, *args)
+
+            for name, data in (("copy_empty.bin", b""), ("copy_data.bin", os.urandom(3 * 1024 * 1024 + 17))):
+                source: Path = self.test_dir / name
+                destination: Path = self.test_dir / "copies" / name
+                source.write_bytes(data)
+
+                requested.clear()
+                if copy_file_range is not None:
+                    os.copy_file_range = recording_copy
+                try:
+                    await self.file_handler.copy_file(source, destination)
+                finally:
+                    if copy_file_range is not None:
+                        os.copy_file_range = copy_file_range
+
+                assert destination.read_bytes() == data
+                assert all(count <= len(data) for count in requested)
+
+            return TestResult(
+                test_name="Copy File",
+                passed=True,
+                duration=time.time() - start_time
+            )
+        except Exception as e:
+            return TestResult(
+                test_name="Copy File",
+                passed=False,
+                duration=time.time() - start_time,
+                error=f"{str(e)}\n{traceback.format_exc()}"
+            )
+
+    async def test_write_file_from_fallback(self) -> TestResult:
+        start_time: float = time.time()
+        try:
+            engine: FluxEngine = FluxEngine(EngineConfig(10 << 20, 1 << 20, 2, 1 << 20, False))
+            source: Path = self.test_dir / "from_source.bin"
+            data: bytes = os.urandom(256 * 1024 + 3)
+            source.write_bytes(data)
+            copy_file_range = getattr(os, "copy_file_range", None)
+
+            def failing_copy(errno_value: int) -> Any:
+                def copy(*args: Any) -> int:
+                    raise OSError(errno_value, os.strerror(errno_value))
+                return copy
+
+            try:
+                # An unsupported copy_file_range falls back to shutil.copyfile
+                os.copy_file_range = failing_copy(errno.EXDEV)
+                destination: Path = self.test_dir / "from_fallback.bin"
+                await engine.write_file_from(str(destination), str(source))
+                assert destination.read_bytes() == data
+
+                # A real I/O error is raised, not papered over
+                os.copy_file_range = failing_copy(errno.ENOSPC)
+                try:
+                    await engine.write_file_from(str(self.test_dir / "from_full.bin"), str(source))
+                    raise AssertionError("ENOSPC should propagate")
+                except OSError as e:
+                    assert e.errno == errno.ENOSPC
+            finally:
+                if copy_file_range is not None:
+                    os.copy_file_range = copy_file_range
+                else:
+                    del os.copy_file_range
+                await engine.aclose()
+
+            return TestResult(
+                test_name="Write File From Fallback",
+                passed=True,
+                duration=time.time() - start_time
+            )
+        except Exception as e:
+            return TestResult(
+                test_name="Write File From Fallback",
+                passed=False,
+                duration=time.time() - start_time,
+                error=f"{str(e)}\n{traceback.format_exc()}"
+            )
+
+    async def test_line_edits(self) -> TestResult:
+        start_time: float = time.time()
+        try:
+            # Line edits keep the file's own line endings
+            test_file: Path = self.test_dir / "line_edits.txt"
+            test_file.write_bytes(b"alpha\r\nbeta\r\ngamma\r\ndelta\r\n")
+
+            await self.text_editor.insert_text(test_file, 1, 2, "XX")
+            assert test_file.read_bytes() == b"alpha\r\nbeXXta\r\ngamma\r\ndelta\r\n"
+
+            deleted: str = await self.text_editor.delete_range(test_file, TextRange(0, 3, 2, 2))
+            assert deleted == "ha\nbeXXta\nga"
+            assert test_file.read_bytes() == b"alpmma\r\ndelta\r\n"
+
+            test_file.write_text("a\nb\nc\nd\n")
+            await self.text_editor.move_lines(test_file, 0, 1, 3)
+            assert test_file.read_text() == "c\na\nb\nd\n"
+
+            # Moving a block onto itself leaves the file untouched
+            inode: int = test_file.stat().st_ino
+            await self.text_editor.move_lines(test_file, 1, 2, 3)
+            assert test_file.stat().st_ino == inode
+            assert test_file.read_text() == "c\na\nb\nd\n"
+
+            return TestResult(
+                test_name="Line Edits",
+                passed=True,
+                duration=time.time() - start_time
+            )
+        except Exception as e:
+            return TestResult(
+                test_name="Line Edits",
+                passed=False,
+                duration=time.time() - start_time,
+                error=f"{str(e)}\n{traceback.format_exc()}"
+            )
+
+    async def test_trim_whitespace(self) -> TestResult:
+        start_time: float = time.time()
+        try:
+            test_file: Path = self.test_dir / "trim.txt"
+            test_file.write_bytes(b"one  \r\n  two\t\r\nthree\r\n")
+
+            await self.text_editor.trim_whitespace(test_file, "trailing")
+            assert test_file.read_bytes() == b"one\r\n  two\r\nthree\r\n"
+
+            # An already-clean file is left alone rather than rewritten
+            inode: int = test_file.stat().st_ino
+            await self.text_editor.trim_whitespace(test_file, "trailing")
+            assert test_file.stat().st_ino == inode
+            assert test_file.read_bytes() == b"one\r\n  two\r\nthree\r\n"
+
+            await self.text_editor.trim_whitespace(test_file, "both")
+            assert test_file.read_bytes() == b"one\r\ntwo\r\nthree\r\n"
+
+            return TestResult(
+                test_name="Trim Whitespace",
+                passed=True,
+                duration=time.time() - start_time
+            )
+        except Exception as e:
+            return TestResult(
+                test_name="Trim Whitespace",
+                passed=False,
+                duration=time.time() - start_time,
+                error=f"{str(e)}\n{traceback.format_exc()}"
+            )
+
+    async def test_simple_search_columns(self) -> TestResult:
+        start_time: float = time.time()
+        try:
+            # Simple mode reports character columns and context, as SearchEngine does
+            engine: FluxEngine = FluxEngine(EngineConfig(10 << 20, 1 << 20, 2, 1 << 20, False))
+            test_file: Path = self.test_dir / "columns.txt"
+            test_file.write_bytes(
+                ("café foo naïve foo\r\n" + "€" * 60 + " foo " + "ü" * 60 + "\nfoo\n").encode("utf-8")
+            )
+            fields: tuple[str, ...] = ("line_number", "column", "match_text", "context_before", "context_after")
+
+            simple: list[dict[str, Any]] = await engine.search(str(test_file), "foo", simple_mode=True)
+            full: list[dict[str, Any]] = await self.search_engine.search(test_file, "foo")
+            assert [m["column"] for m in simple] == [5, 15, 61, 0]
+            assert [{k: m[k] for k in fields} for m in simple] == [{k: m[k] for k in fields} for m in full]
+
+            return TestResult(
+                test_name="Simple Search Columns",
+                passed=True,
+                duration=time.time() - start_time
+            )
+        except Exception as e:
+            return TestResult(
+                test_name="Simple Search Columns",
+                passed=False,
+                duration=time.time() - start_time,
+                error=f"{str(e)}\n{traceback.format_exc()}"
+            )
+
+
+    async def test_checkpoint_hash(self) -> TestResult:
+        start_time: float = time.time()
+        try:
+            # content_hash stays a bare hex digest; the algorithm goes in metadata
+            version_control: VersionControl = VersionControl(self.test_dir / "checkpoints.db")
+            content: bytes = b"checkpoint content\n"
+            checkpoint_id: str = await version_control.create_checkpoint(
+                "hash", self.test_dir / "hashed.txt", content, {"reason": "test"}
+            )
+            checkpoint: Checkpoint = await version_control.restore_checkpoint(checkpoint_id)
+            algorithm: str = checkpoint.metadata["hash_algorithm"]
+            assert algorithm in ("blake3", "sha256")
+            assert checkpoint.metadata["reason"] == "test"
+            if algorithm == "sha256":
+                assert checkpoint.content_hash == hashlib.sha256(content).hexdigest()
+            else:
+                assert len(checkpoint.content_hash) == 64
+                int(checkpoint.content_hash, 16)
+
+            return TestResult(
+                test_name="Checkpoint Hash",
+                passed=True,
+                duration=time.time() - start_time
+            )
+        except Exception as e:
+            return TestResult(
+                test_name="Checkpoint Hash",
+                passed=False,
+                duration=time.time() - start_time,
+                error=f"{str(e)}\n{traceback.format_exc()}"
+            )
+
+
+    async def run_all_tests(self) -> None:
+        tests: list[tuple[str, callable]] = [
+            ("Failed Commit Rollback", self.test_failed_commit_rolls_back),
+            ("Search Line Breaks And Offsets", self.test_search_line_breaks_and_offsets),
+            ("Multi-File Search Matches Search", self.test_multi_file_search_matches_search),
+            ("BOM Detection", self.test_bom_detection),
+            ("Replace Line Breaks And Encoding", self.test_replace_line_breaks_and_encoding),
+            ("Copy File", self.test_copy_file),
+            ("Write File From Fallback", self.test_write_file_from_fallback),
+            ("Line Edits", self.test_line_edits),
+            ("Trim Whitespace", self.test_trim_whitespace),
+            ("Simple Search Columns", self.test_simple_search_columns),
+            ("Checkpoint Hash", self.test_checkpoint_hash),
+        ]
+
+        print("FLUX Regression Tests")
+        print("=" * 50)
+
+        for test_name, test_func in tests:
+            print(f"\nRunning: {test_name}")
+            result: TestResult = await test_func()
+            self.results.append(result)
+
+            if result.passed:
+                print(f"✓ PASSED in {result.duration:.3f}s")
+            else:
+                print(f"✗ FAILED in {result.duration:.3f}s")
+                print(f"  Error: {result.error}")
+
+        await self.cleanup()
+
+        # Summary
+        print("\n" + "=" * 50)
+        print("Test Summary")
+        print("=" * 50)
+
+        passed: int = sum(1 for r in self.results if r.passed)
+        failed: int = len(self.results) - passed
+
+        print(f"Total Tests: {len(self.results)}")
+        print(f"Passed: {passed}")
+        print(f"Failed: {failed}")
+
+
+if __name__ == "__main__":
+    tester: RegressionTester = RegressionTester()
+    asyncio.run(tester.run_all_tests())
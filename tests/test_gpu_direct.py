@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import tempfile
 import time
 from pathlib import Path
+import numpy as np
 from flux_mcp.core.metal_accelerator import MetalAccelerator
 
 # Create test file
@@ -31,11 +33,11 @@ content_bytes: bytes = test_file.read_bytes()
 print(f"\nSearching for '{pattern}' in {len(content_bytes)} bytes...")
 
 start_time: float = time.time()
-matches: list[int] = accelerator.search_gpu(content_bytes, compiled)
+matches: np.ndarray = asyncio.run(accelerator.search_gpu(content_bytes, compiled))
 end_time: float = time.time()
 
 print(f"Found {len(matches)} matches in {(end_time - start_time) * 1000:.2f} ms")
-if matches:
+if len(matches):
     print(f"First match at position: {matches[0]}")
 
 # Cleanup